@@ -0,0 +1,4 @@
+"""Benchmarks for django_listview_filters.
+
+Run from the repository root with ``python -m benchmarks.run --help``.
+"""
@@ -0,0 +1,21 @@
+from django.db import models
+
+STATUS_CHOICES = [(f"s{i:02d}", f"Status {i}") for i in range(40)]
+
+
+class Category(models.Model):
+    name = models.CharField(max_length=100)
+
+    def __str__(self):
+        return self.name
+
+
+class Item(models.Model):
+    code = models.CharField(max_length=20)
+    status = models.CharField(max_length=3, choices=STATUS_CHOICES)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True)
+    size = models.IntegerField()
+    created = models.DateTimeField()
+
+    def __str__(self):
+        return self.code
@@ -0,0 +1,280 @@
+"""Benchmark filter construction, queryset filtering and sidebar rendering.
+
+Builds a synthetic table in an in-memory SQLite database and measures
+``FilterViewMixin.get_filters``, ``filter_queryset``, ``get_context_data`` and
+the ``choices()`` of each filter class under a few settings scenarios. For each
+target the wall time (min/median over ``--repeat`` runs), number of queries and
+peak Python memory (from a separate ``tracemalloc`` run) are reported.
+
+Data is generated from ``--seed``, so runs with the same arguments are
+comparable. Save a run with ``--output`` and compare a later one against it
+with ``--compare``::
+
+    python -m benchmarks.run --rows 100000 --output before.json
+    python -m benchmarks.run --rows 100000 --compare before.json
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+SCENARIOS = {
+    "default": {},
+    "hide_unused": {"FILTERVIEW_SHOW_UNUSED_FILTERS": False},
+    "facets": {
+        "FILTERVIEW_SHOW_UNUSED_FILTERS": False,
+        "FILTERVIEW_SHOW_FACETS": True,
+    },
+    "cached": {
+        "FILTERVIEW_SHOW_UNUSED_FILTERS": False,
+        "FILTERVIEW_CACHE": "default",
+    },
+}
+
+QUERIES = {
+    "unfiltered": "",
+    "filtered": "?status__exact=s01&size=5",
+}
+
+
+def setup_django():
+    settings.configure(
+        DEBUG=False,
+        SECRET_KEY="benchmarks",
+        INSTALLED_APPS=[
+            "django.contrib.contenttypes",
+            "django.contrib.auth",
+            "django.contrib.messages",
+            "benchmarks",
+        ],
+        DATABASES={
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": ":memory:",
+            },
+        },
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            },
+        },
+        DEFAULT_AUTO_FIELD="django.db.models.AutoField",
+        USE_TZ=True,
+    )
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command("migrate", run_syncdb=True, verbosity=0)
+
+
+def populate(rows: int, categories: int, distinct: int, seed: int):
+    """Fill the tables with <rows> items.
+
+    Only 80% of the categories and 30 of the 40 statuses are used, and 5% of
+    items have no category, so "unused" and empty choices are exercised.
+    """
+    from benchmarks.models import STATUS_CHOICES, Category, Item
+
+    rng = random.Random(seed)
+    Category.objects.bulk_create(
+        [Category(name=f"Category {i}") for i in range(categories)],
+    )
+    category_ids = list(Category.objects.values_list("pk", flat=True))
+    used_category_ids = category_ids[: max(1, int(len(category_ids) * 0.8))]
+    statuses = [value for value, _ in STATUS_CHOICES[:30]]
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    batch = []
+    for i in range(rows):
+        batch.append(
+            Item(
+                code=f"I{i:08d}",
+                status=rng.choice(statuses),
+                category_id=(
+                    rng.choice(used_category_ids) if rng.random() > 0.05 else None
+                ),
+                size=rng.randrange(distinct),
+                created=start + timedelta(minutes=rng.randrange(10**6)),
+            ),
+        )
+        if len(batch) == 5000:
+            Item.objects.bulk_create(batch)
+            batch = []
+    Item.objects.bulk_create(batch)
+
+
+def make_view(query: str):
+    from django.test import RequestFactory
+
+    from benchmarks.views import ItemListView
+
+    request = RequestFactory().get(f"/items/{query}")
+    view = ItemListView()
+    view.setup(request)
+    return view
+
+
+def target_get_filters(query: str):
+    view = make_view(query)
+    view.params = view.get_params(view.request)
+    view.model = view.queryset.model
+    return lambda: view.get_filters(view.request)
+
+
+def target_filter_queryset(query: str):
+    view = make_view(query)
+    return view.get_queryset
+
+
+def target_get_context_data(query: str):
+    view = make_view(query)
+
+    def run():
+        view.object_list = view.get_queryset()
+        view.get_context_data()
+
+    return run
+
+
+def target_choices(query: str, filter_class):
+    view = make_view(query)
+    view.object_list = view.get_queryset()
+    spec = next(s for s in view.filter_specs if type(s) is filter_class)
+    return lambda: list(spec.choices(view))
+
+
+def get_targets():
+    from benchmarks.views import ItemListView
+
+    targets = {
+        "get_filters": target_get_filters,
+        "filter_queryset": target_filter_queryset,
+        "get_context_data": target_get_context_data,
+    }
+    for _, filter_class in ItemListView.list_filter:
+        targets[f"choices:{filter_class.__name__}"] = (
+            lambda query, filter_class=filter_class: target_choices(
+                query,
+                filter_class,
+            )
+        )
+    return targets
+
+
+def measure(setup, repeat: int) -> dict:
+    """Time <repeat> fresh runs of <setup>() and measure one for memory."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings = []
+    for _ in range(repeat):
+        run = setup()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+
+    run = setup()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "queries": len(queries),
+        "peak_memory": peak,
+    }
+
+
+def run_benchmarks(repeat: int) -> dict:
+    from django.core.cache import cache
+    from django.test import override_settings
+
+    results = {}
+    targets = get_targets()
+    for scenario, overrides in SCENARIOS.items():
+        with override_settings(**overrides):
+            for query_name, query in QUERIES.items():
+                for target_name, target in targets.items():
+                    cache.clear()
+                    name = f"{scenario}/{query_name}/{target_name}"
+                    results[name] = measure(lambda: target(query), repeat)
+                    print_result(name, results[name])
+    return results
+
+
+def print_result(name: str, result: dict, previous: dict = None):
+    line = "{:<60} {:>10.2f} ms {:>5} q {:>10.1f} KiB".format(
+        name,
+        result["median"] * 1000,
+        result["queries"],
+        result["peak_memory"] / 1024,
+    )
+    if previous:
+        line += "   x{:.2f} time, {:+d} q".format(
+            result["median"] / previous["median"] if previous["median"] else 0,
+            result["queries"] - previous["queries"],
+        )
+    print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--categories", type=int, default=500)
+    parser.add_argument(
+        "--distinct",
+        type=int,
+        default=1000,
+        help="Number of distinct values of the free-value field.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Compare with a JSON file from --output.")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    populate(args.rows, args.categories, args.distinct, args.seed)
+
+    results = run_benchmarks(args.repeat)
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        if previous["meta"]["arguments"] != vars(args) | {
+            "output": previous["meta"]["arguments"]["output"],
+            "compare": previous["meta"]["arguments"]["compare"],
+        }:
+            print("\nWarning: compared runs used different arguments.")
+        print(f"\nCompared with {args.compare}:")
+        for name, result in results.items():
+            print_result(name, result, previous["results"].get(name))
+
+    if args.output:
+        meta = {
+            "arguments": vars(args),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "platform": platform.platform(),
+        }
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+from django.views.generic import ListView
+
+from django_listview_filters.filters import (
+    AllValuesFieldListFilter,
+    ChoicesFieldListViewFilter,
+    DateRangeListViewFilter,
+    RelatedFieldListViewFilter,
+)
+from django_listview_filters.mixins import FilterViewMixin
+
+from .models import Item
+
+
+class ItemListView(FilterViewMixin, ListView):
+    queryset = Item.objects.order_by("pk")
+    paginate_by = 50
+    list_filter = [
+        ("category", RelatedFieldListViewFilter),
+        ("status", ChoicesFieldListViewFilter),
+        ("size", AllValuesFieldListFilter),
+        ("created", DateRangeListViewFilter),
+    ]
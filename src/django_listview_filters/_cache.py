@@ -0,0 +1,106 @@
+import hashlib
+import time
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from ._helpers import get_setting
+from ._settings import FILTER_PREFIX
+
+
+def get_choices_cache():
+    """Return the cache set by ``FILTERVIEW_CACHE``, or None if not enabled."""
+    alias = get_setting(f"{FILTER_PREFIX}CACHE", None)
+    return caches[alias] if alias else None
+
+
+def _version_key(model) -> str:
+    return f"{FILTER_PREFIX}{model._meta.label_lower}:version"
+
+
+def get_model_version(cache, model) -> int:
+    """Return the current cache version of <model>.
+
+    Cached choices include the version of every model they were built from,
+    so bumping it on a change makes those entries unreachable. The initial
+    value is time based so an evicted version never reuses an old one.
+    """
+    connect_invalidation(model)
+    return cache.get_or_set(_version_key(model), time.time_ns(), timeout=None)
+
+
+def invalidate_model(model):
+    """Make every cached choice list built from <model> stale."""
+    cache = get_choices_cache()
+    if cache is None:
+        return
+    try:
+        cache.incr(_version_key(model))
+    except ValueError:
+        # Nothing has been cached for this model yet.
+        pass
+
+
+def _invalidate_sender(sender, **kwargs):
+    invalidate_model(sender)
+
+
+def _invalidate_m2m(sender, instance, action, model, **kwargs):
+    if action.startswith("post_"):
+        invalidate_model(type(instance))
+        invalidate_model(model)
+
+
+def _get_through_models(model) -> set:
+    """Return the through models of the many-to-many relations of <model>."""
+    through_models = {field.remote_field.through for field in model._meta.many_to_many}
+    through_models.update(
+        relation.through
+        for relation in model._meta.related_objects
+        if relation.many_to_many
+    )
+    return through_models
+
+
+def connect_invalidation(model):
+    """Connect the signals that invalidate cached choices for <model>.
+
+    ``m2m_changed`` is only connected for the through models of <model>'s
+    many-to-many relations.
+    """
+    dispatch_uid = f"{FILTER_PREFIX}{model._meta.label_lower}"
+    post_save.connect(_invalidate_sender, sender=model, dispatch_uid=dispatch_uid)
+    post_delete.connect(_invalidate_sender, sender=model, dispatch_uid=dispatch_uid)
+    for through in _get_through_models(model):
+        m2m_changed.connect(
+            _invalidate_m2m,
+            sender=through,
+            dispatch_uid=f"{FILTER_PREFIX}{through._meta.label_lower}",
+        )
+
+
+def connect_all_invalidation():
+    """Connect the invalidation signals of every installed model.
+
+    Called when the app is ready if ``FILTERVIEW_CACHE`` is set, so writes
+    from processes that never build a filter (other workers, management
+    commands, task queues) still invalidate a shared cache.
+    """
+    for model in apps.get_models():
+        connect_invalidation(model)
+
+
+def get_cache_key(parts, models) -> str:
+    """Return a cache key for <parts> scoped to the versions of <models>.
+
+    <parts> are hashed from their ``repr()``, so any value (e.g. a label
+    expression) can be part of the key.
+    """
+    cache = get_choices_cache()
+    versions = [
+        f"{model._meta.label_lower}.{get_model_version(cache, model)}"
+        for model in models
+    ]
+    digest = hashlib.md5(repr(list(parts)).encode(), usedforsecurity=False)
+    return ":".join([FILTER_PREFIX.rstrip("_"), digest.hexdigest(), *versions])
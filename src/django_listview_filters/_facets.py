@@ -0,0 +1,173 @@
+import asyncio
+import operator
+from functools import reduce
+
+from django.db import connections, models
+from django.db.models.functions import Cast
+
+
+def facet_queryset(queryset, field_path: str, distinct: bool = False):
+    """Return <queryset> grouped by <field_path> as ``(value, count)`` rows.
+
+    All facets share this shape so that they can be combined into a single
+    ``UNION ALL`` query by :func:`run_facet_querysets`.
+
+    :param queryset: Queryset to group
+    :type queryset: QuerySet
+    :param field_path: Field (or related field path) to group by
+    :type field_path: str
+    :param distinct: Count distinct primary keys, needed for multi-valued paths
+    :type distinct: bool
+    """
+    return (
+        queryset.order_by()
+        .annotate(facet_value=models.F(field_path))
+        .values("facet_value")
+        .annotate(facet_count=models.Count("pk", distinct=distinct))
+    )
+
+
+# Column types whose values can share a UNION once cast to a common type.
+_TYPE_CLASSES = {
+    "CharField": "text",
+    "EmailField": "text",
+    "SlugField": "text",
+    "TextField": "text",
+    "URLField": "text",
+    "AutoField": "integer",
+    "BigAutoField": "integer",
+    "BigIntegerField": "integer",
+    "IntegerField": "integer",
+    "PositiveBigIntegerField": "integer",
+    "PositiveIntegerField": "integer",
+    "PositiveSmallIntegerField": "integer",
+    "SmallAutoField": "integer",
+    "SmallIntegerField": "integer",
+}
+_CAST_FIELDS = {
+    "text": models.TextField,
+    "integer": models.BigIntegerField,
+}
+
+
+def _value_field(queryset):
+    field = queryset.query.annotations["facet_value"].output_field
+    # A relation is grouped by the column it stores.
+    while getattr(field, "target_field", None) is not None:
+        field = field.target_field
+    return field
+
+
+def _union_key(queryset):
+    """Return the key of the group of facets <queryset> can be combined with.
+
+    Text and integer columns are grouped by type class, whatever their length
+    or size, and cast to a common type when their database types differ.
+    Other columns are only combined with columns of the same database type,
+    so the ``UNION`` is valid on strict backends and every row goes through
+    the right converters.
+    """
+    field = _value_field(queryset)
+    type_class = _TYPE_CLASSES.get(field.get_internal_type())
+    if type_class is None:
+        type_class = field.db_type(connections[queryset.db])
+    return (queryset.db, type_class)
+
+
+def _combine_facet_querysets(facets: dict) -> list:
+    """Return a list of ``(group, queryset)``, one ``UNION ALL`` per group.
+
+    Each group is a list of the ``(key, queryset)`` of <facets> it combines.
+    """
+    groups = {}
+    for key, queryset in facets.items():
+        groups.setdefault(_union_key(queryset), []).append((key, queryset))
+
+    combined = []
+    for (db, type_class), group in groups.items():
+        db_types = {
+            _value_field(queryset).db_type(connections[db]) for _, queryset in group
+        }
+        value_name, casts = "facet_value", {}
+        if len(db_types) > 1:
+            value_name = "facet_union_value"
+            casts[value_name] = Cast("facet_value", _CAST_FIELDS[type_class]())
+        querysets = [
+            queryset.annotate(facet_key=models.Value(str(index)), **casts).values_list(
+                "facet_key",
+                value_name,
+                "facet_count",
+            )
+            for index, (key, queryset) in enumerate(group)
+        ]
+        union = querysets[0]
+        if len(querysets) > 1:
+            union = union.union(*querysets[1:], all=True)
+        combined.append((group, union))
+    return combined
+
+
+def _add_facet_rows(results: dict, group: list, rows):
+    for index, value, count in rows:
+        key = group[int(index)][0]
+        results[key][value] = count
+
+
+def run_facet_querysets(facets: dict) -> dict:
+    """Run every facet in <facets> and return ``{key: {value: count}}``.
+
+    Facets with compatible value columns are run together as one
+    ``UNION ALL`` query, so the number of queries depends on the number of
+    column types involved rather than the number of facets.
+
+    :param facets: Facet querysets from :func:`facet_queryset`, keyed by name
+    :type facets: dict
+    """
+    results = {key: {} for key in facets}
+    for group, queryset in _combine_facet_querysets(facets):
+        _add_facet_rows(results, group, queryset)
+    return results
+
+
+def combine_choice_querysets(querysets: list):
+    """Return one queryset of the objects in any of <querysets>.
+
+    <querysets> must be of the same model. Each object is annotated with
+    ``listview_choice_<index>``, True if it is in the queryset at <index>, so
+    the choices of several filters on one related model are read with a
+    single ``pk__in`` query.
+
+    :param querysets: Querysets of the same model
+    :type querysets: list
+    """
+    queries = [models.Q(pk__in=queryset.values("pk")) for queryset in querysets]
+    combined = querysets[0].model._default_manager.db_manager(querysets[0].db)
+    return combined.filter(reduce(operator.or_, queries)).annotate(
+        **{
+            f"listview_choice_{index}": models.ExpressionWrapper(
+                query,
+                output_field=models.BooleanField(),
+            )
+            for index, query in enumerate(queries)
+        },
+    )
+
+
+async def _afetch(queryset) -> list:
+    return [row async for row in queryset]
+
+
+async def arun_facet_querysets(facets: dict) -> dict:
+    """Async counterpart of :func:`run_facet_querysets`.
+
+    The ``UNION ALL`` queries of each column type are run concurrently.
+
+    :param facets: Facet querysets from :func:`facet_queryset`, keyed by name
+    :type facets: dict
+    """
+    results = {key: {} for key in facets}
+    combined = _combine_facet_querysets(facets)
+    rows = await asyncio.gather(*(_afetch(queryset) for _, queryset in combined))
+    for (group, _), group_rows in zip(combined, rows):
+        _add_facet_rows(results, group, group_rows)
+    return results
@@ -1,4 +1,10 @@
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from ._settings import FILTER_PREFIX
+
+_class_settings = {}
 
 
 def get_setting(setting_name: str, default):
@@ -13,3 +19,47 @@ def get_setting(setting_name: str, default):
         getattr(settings, setting_name) if hasattr(settings, setting_name) else default
     )
     return string
+
+
+def get_class_settings(cls, setting_attributes: dict) -> dict:
+    """Return the attributes of <cls> with project settings applied.
+
+    Each attribute takes the value of ``FILTERVIEW_<NAME>`` if set, unless a
+    class outside this package (<cls> or a project base class) sets it, in
+    which case that value is kept. Settings are read once per class and cached
+    until a ``FILTERVIEW_`` setting changes (e.g. with ``override_settings``).
+
+    :param cls: Class whose attributes are the defaults
+    :type cls: type
+    :param setting_attributes: Mapping of attribute name to setting name,
+        without the ``FILTERVIEW_`` prefix
+    :type setting_attributes: dict
+    """
+    try:
+        return _class_settings[cls]
+    except KeyError:
+        snapshot = {
+            attribute: (
+                getattr(cls, attribute)
+                if is_overridden(cls, attribute)
+                else get_setting(f"{FILTER_PREFIX}{name}", getattr(cls, attribute))
+            )
+            for attribute, name in setting_attributes.items()
+        }
+        _class_settings[cls] = snapshot
+        return snapshot
+
+
+def is_overridden(cls, attribute: str) -> bool:
+    """Whether <attribute> of <cls> is set by a class outside this package."""
+    for klass in cls.__mro__:
+        if attribute in vars(klass):
+            module = klass.__module__
+            return module != __package__ and not module.startswith(f"{__package__}.")
+    return False
+
+
+@receiver(setting_changed)
+def clear_class_settings(setting, **kwargs):
+    if setting.startswith(FILTER_PREFIX):
+        _class_settings.clear()
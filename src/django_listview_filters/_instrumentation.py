@@ -0,0 +1,46 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+
+logger = logging.getLogger("django_listview_filters")
+
+
+@contextmanager
+def profile_stage(records: list, stage: str, using: str, filter_spec=None):
+    """Record the time and queries spent in the body of the ``with`` block.
+
+    Yields the record dict, which is appended to <records> on exit. Set its
+    ``filter_spec`` inside the block if the spec is created there.
+
+    :param records: List the record is appended to
+    :type records: list
+    :param stage: Name of the stage, e.g. "construction"
+    :type stage: str
+    :param using: Alias of the database to record queries on
+    :type using: str
+    """
+    queries = []
+
+    def record_query(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            queries.append({"sql": sql, "time": time.perf_counter() - start})
+
+    record = {"filter_spec": filter_spec, "stage": stage, "queries": queries}
+    start = time.perf_counter()
+    with connections[using].execute_wrapper(record_query):
+        yield record
+    record["time"] = time.perf_counter() - start
+    record["filter"] = getattr(record["filter_spec"], "title", None)
+    records.append(record)
+    logger.debug(
+        "%s %s: %.2f ms, %d queries",
+        record["filter"],
+        stage,
+        record["time"] * 1000,
+        len(queries),
+    )
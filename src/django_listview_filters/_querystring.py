@@ -0,0 +1,97 @@
+import heapq
+from urllib.parse import urlencode
+
+
+class QueryString:
+    """Parsed query string of a request, used to build filter links.
+
+    The request is parsed once and each ``key=value`` pair encoded once. The
+    encoded pairs left after a given ``remove``/``new_params`` combination are
+    cached, so building the link of each choice of a filter only encodes the
+    new values and joins strings.
+
+    With ``sort_keys``, parameters are kept sorted by key, new ones included,
+    so equal parameters always give the same URL. The sorted pairs left are
+    cached in the same way and the new ones merged into them.
+    """
+
+    def __init__(self, path: str, pairs, sort_keys: bool = False):
+        self.path = path
+        self.sort_keys = sort_keys
+        self._pairs = tuple(
+            (str(key), urlencode({key: value})) for key, value in pairs
+        )
+        self._keys = frozenset(key for key, _ in self._pairs)
+        self._bases = {}
+        self._sorted_bases = {}
+
+    @classmethod
+    def from_request(cls, request, path: str = None):
+        pairs = [
+            (key, value) for key, values in request.GET.lists() for value in values
+        ]
+        return cls(path or request.path, pairs)
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def __iter__(self):
+        return (key for key in dict.fromkeys(key for key, _ in self._pairs))
+
+    @property
+    def query(self) -> str:
+        """Return the encoded query string, without the path."""
+        return self._base((), ())
+
+    def _kept_pairs(self, remove: tuple, replaced: tuple) -> list:
+        return [
+            (key, encoded)
+            for key, encoded in self._pairs
+            if not key.startswith(remove) and key not in replaced
+        ]
+
+    def _base(self, remove: tuple, replaced: tuple) -> str:
+        base_key = (remove, replaced)
+        if base_key not in self._bases:
+            self._bases[base_key] = "&".join(
+                encoded for _key, encoded in self._kept_pairs(remove, replaced)
+            )
+        return self._bases[base_key]
+
+    def _sorted_base(self, remove: tuple, replaced: tuple) -> list:
+        base_key = (remove, replaced)
+        if base_key not in self._sorted_bases:
+            self._sorted_bases[base_key] = sorted(
+                self._kept_pairs(remove, replaced),
+                key=lambda pair: pair[0],
+            )
+        return self._sorted_bases[base_key]
+
+    def build(self, new_params: dict = None, remove: list = None) -> str:
+        """Return the path with a query string with <new_params> set.
+
+        :param new_params: Parameters to set; a value of None removes the key
+        :type new_params: dict
+        :param remove: Prefixes of keys to remove
+        :type remove: list
+        """
+        new_params = new_params or {}
+        remove = tuple(remove or ())
+        added = [
+            (str(key), urlencode({key: value}))
+            for key, value in new_params.items()
+            if value is not None
+        ]
+        if self.sort_keys and added:
+            added.sort(key=lambda pair: pair[0])
+            pairs = heapq.merge(
+                self._sorted_base(remove, tuple(new_params)),
+                added,
+                key=lambda pair: pair[0],
+            )
+            parts = [encoded for _key, encoded in pairs]
+        else:
+            parts = [self._base(remove, tuple(new_params))]
+            parts.extend(encoded for _key, encoded in added)
+        query = "&".join(part for part in parts if part)
+        return f"{self.path}?{query}" if query else self.path
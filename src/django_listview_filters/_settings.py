@@ -3,9 +3,11 @@ ALL_VAR = "all"
 PAGE_VAR = "page"
 SEARCH_VAR = "search"
 ERROR_VAR = "error"
+CURSOR_VAR = "cursor"
 IGNORED_PARAMS = [
     ALL_VAR,
     PAGE_VAR,
     SEARCH_VAR,
     ERROR_VAR,
+    CURSOR_VAR,
 ]
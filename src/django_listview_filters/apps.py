@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+from ._cache import connect_all_invalidation, get_choices_cache
+
+
+class ListViewFiltersConfig(AppConfig):
+    name = "django_listview_filters"
+    verbose_name = "ListView Filters"
+
+    def ready(self):
+        if get_choices_cache() is not None:
+            connect_all_invalidation()
@@ -1,24 +1,27 @@
+import asyncio
+from datetime import timedelta
+
 from django.contrib import messages
 from django.contrib.admin.options import IncorrectLookupParameters
-
-# get_fields_from_path,; lookup_spawns_duplicates,
 from django.contrib.admin.utils import (
     get_model_from_relation,
+    lookup_spawns_duplicates,
     prepare_lookup_value,
     reverse_field_path,
 )
 from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.db import models
-from furl import furl
+from django.db.models.functions import Concat
+from django.utils import timezone
 
-from ._helpers import get_setting
+from ._cache import get_cache_key, get_choices_cache
+from ._facets import combine_choice_querysets, facet_queryset
+from ._helpers import get_class_settings, get_setting
 from ._settings import (  # ALL_VAR,; PAGE_VAR,; SEARCH_VAR,; ERROR_VAR,
     FILTER_PREFIX,
     IGNORED_PARAMS,
 )
 
-# from django.db.models import Count
-
 
 class ListViewFilter:
     """
@@ -29,24 +32,22 @@ class ListViewFilter:
     title = None  # Human-readable title to appear in the right sidebar.
     show_all = True
     show_unused_filters = True
+    show_facets = False
+    extra_ignored_params = None
+    # Attributes overridden by a ``FILTERVIEW_<NAME>`` setting, if set.
+    setting_attributes = {
+        "show_all": "SHOW_ALL",
+        "show_unused_filters": "SHOW_UNUSED_FILTERS",
+        "show_facets": "SHOW_FACETS",
+        "extra_ignored_params": "EXTRA_IGNORED_PARAMS",
+    }
 
     def __init__(self, request, params, model):
         self.used_parameters = {}
-        self.show_all = get_setting(f"{FILTER_PREFIX}SHOW_ALL", self.show_all)
-        self.show_unused_filters = get_setting(
-            f"{FILTER_PREFIX}SHOW_UNUSED_FILTERS",
-            self.show_unused_filters,
-        )
+        self.facet_results = {}
+        self.__dict__.update(get_class_settings(type(self), self.setting_attributes))
 
-        extra_ignored_params = get_setting(
-            f"{FILTER_PREFIX}EXTRA_IGNORED_PARAMS",
-            None,
-        )
-
-        self.ignored_params = IGNORED_PARAMS
-
-        if extra_ignored_params:
-            self.ignored_params += extra_ignored_params
+        self.ignored_params = [*IGNORED_PARAMS, *(self.extra_ignored_params or [])]
 
         if self.title is None:
             raise ImproperlyConfigured(
@@ -87,88 +88,543 @@ class ListViewFilter:
                 method.",
         )
 
+    def get_facet_querysets(self, changelist):
+        """
+        Return a dict of ``{name: queryset}`` for the facets this filter needs,
+        each built with ``facet_queryset()``. FilterViewMixin runs the facets of
+        every filter together and passes the results to ``set_facet_result()``.
+        """
+        return {}
+
+    def normalize_parameter(self, name: str, value: str) -> str:
+        """Return the canonical form of <value> for the parameter <name>.
+
+        Used by FilterViewMixin to build canonical URLs, so the same filter
+        state always has the same URL. Returning None drops the parameter.
+        """
+        return value
+
+    async def aload_choices(self, request):
+        """Load what has_output() needs with the async ORM.
+
+        Called by AsyncFilterViewMixin for every filter spec concurrently,
+        before has_output(). Filters whose has_output() queries the database
+        must override it.
+        """
+
+    async def aprefetch(self, changelist):
+        """Run the queries choices() needs, other than facets, with the async ORM.
+
+        Called by AsyncFilterViewMixin for every filter spec concurrently, once
+        the queryset is filtered and before the facets are prefetched.
+        """
+
+    def set_facet_result(self, name, result):
+        self.facet_results[name] = result
+
+    def get_facet_result(self, name, get_queryset):
+        """Return the facet <name>, running get_queryset() if it wasn't prefetched."""
+        if name not in self.facet_results:
+            self.facet_results[name] = dict(
+                get_queryset().values_list("facet_value", "facet_count"),
+            )
+        return self.facet_results[name]
+
     def clear_filter_string(self, view):
         expected_params = self.expected_parameters()
-        query = furl(view.request.get_full_path())
-        has_param = False
-        for expected_p in expected_params:
-            if expected_p in query.args:
-                has_param = True
-                del query.args[expected_p]
-
-        if has_param:
-            return query.url
+        if any(p in view.request.GET for p in expected_params):
+            return view.get_query_string({p: None for p in expected_params})
         else:
             return None
 
+    @property
+    def key(self) -> str:
+        """Identifies the filter in ``get_payload()``."""
+        return self.__class__.__name__
+
+    def get_payload(self, changelist) -> dict:
+        """Return the filter and its choices as a JSON-serializable dict.
+
+        Each choice has ``label``, ``url`` and ``selected`` keys, plus
+        ``value``, ``count`` and any marker key (``more``, ``autocomplete``,
+        ``range``) its ``choices()`` dict has.
+
+        :param changelist: View the choices link to
+        :type changelist: FilterViewMixin
+        """
+        choices = []
+        for choice in self.choices(changelist):
+            choice = choice.copy()
+            payload = {
+                "label": str(choice.pop("display")),
+                "url": choice.pop("query_string"),
+            }
+            payload.update(choice)
+            choices.append(payload)
+        return {
+            "key": self.key,
+            "title": str(self.title),
+            "clear_url": self.clear_filter_string(changelist),
+            "choices": choices,
+        }
+
+
+class SimpleListViewFilter(ListViewFilter):
+    """
+    Base class for filters on a single parameter with declared lookups, the
+    counterpart of the admin's ``SimpleListFilter``. Subclasses set ``title``
+    and ``parameter_name`` and provide ``lookups()``; selecting a lookup
+    filters the list by its ``Q``.
+
+    With facets enabled or unused filters hidden, every lookup is counted in a
+    single aggregate query, with a ``COUNT`` per lookup filtered by its ``Q``.
+    """
+
+    parameter_name = None
+
+    def __init__(self, request, params, model):
+        super().__init__(request, params, model)
+        if self.parameter_name is None:
+            raise ImproperlyConfigured(
+                "The list view filter '{}' does not specify a 'parameter_name'.".format(
+                    self.__class__.__name__,
+                ),
+            )
+        self.model = model
+        if self.parameter_name in params:
+            self.used_parameters[self.parameter_name] = params.pop(
+                self.parameter_name,
+            )
+        self.lookup_choices = [
+            (str(value), label, query)
+            for value, label, query in self.lookups(request, model) or ()
+        ]
+
+    def lookups(self, request, model):
+        """
+        Return a list of ``(value, label, Q)`` tuples. <value> is the URL
+        parameter, <label> is shown in the template and <Q> filters the list
+        when the lookup is selected.
+        """
+        raise NotImplementedError(
+            "Subclasses of SimpleListViewFilter must provide a 'lookups()' method.",
+        )
+
+    def value(self):
+        """Return the selected lookup value, or None."""
+        return self.used_parameters.get(self.parameter_name)
+
+    def expected_parameters(self):
+        return [self.parameter_name]
+
+    def has_output(self):
+        return len(self.lookup_choices) > 0
+
+    @property
+    def key(self) -> str:
+        return self.parameter_name
+
+    def get_lookup_query(self, value):
+        """Return the ``Q`` of the lookup <value>, or None if there isn't one."""
+        for lookup_value, _label, query in self.lookup_choices:
+            if lookup_value == value:
+                return query
+        return None
+
+    def query_spawns_duplicates(self, query: models.Q) -> bool:
+        """Return True if a lookup of <query> spans a multi-valued relation."""
+        for child in query.children:
+            if isinstance(child, models.Q):
+                if self.query_spawns_duplicates(child):
+                    return True
+            elif isinstance(child, tuple) and lookup_spawns_duplicates(
+                self.model._meta,
+                child[0],
+            ):
+                return True
+        return False
+
+    def queryset(self, request, queryset):
+        """Return <queryset> filtered by the ``Q`` of the selected lookup.
+
+        A ``Q`` spanning a multi-valued relation is matched in a ``pk__in``
+        subquery, as in ``FieldListViewFilter.queryset()``. An unknown value
+        matches nothing.
+        """
+        value = self.value()
+        if value is None:
+            return queryset
+        query = self.get_lookup_query(value)
+        if query is None:
+            return queryset.none()
+        if self.query_spawns_duplicates(query):
+            matches = queryset.model._default_manager.filter(query)
+            return queryset.filter(pk__in=matches.values("pk"))
+        return queryset.filter(query)
+
+    def get_count_names(self) -> list:
+        """Return the lookup counts choices() needs (see get_lookup_counts())."""
+        names = []
+        if self.show_facets:
+            names.append("counts")
+        if not self.show_unused_filters:
+            names.append("used")
+        return names
+
+    def get_lookup_counts(self, changelist, name: str) -> dict:
+        """Return a dict of ``{value: count}`` for every lookup, using a single query.
+
+        For "counts" (facets), objects are counted over the view's queryset
+        with every filter except this one applied; for "used" (hiding unused
+        lookups), over the whole table. Each lookup is a ``COUNT`` with a
+        ``FILTER``/``CASE WHEN`` clause of its ``Q``.
+
+        :param changelist: View providing ``get_facet_queryset()``
+        :type changelist: FilterViewMixin
+        :param name: "counts" or "used"
+        :type name: str
+        """
+        if name not in self.facet_results:
+            queryset, aggregates = self.get_lookup_aggregates(changelist, name)
+            self.facet_results[name] = self.get_counts_by_value(
+                queryset.aggregate(**aggregates) if aggregates else {},
+            )
+        return self.facet_results[name]
+
+    def get_lookup_aggregates(self, changelist, name: str):
+        """Return the queryset to count lookups on and its ``Count`` aggregates.
+
+        The counts share one aggregate query, so if any lookup joins a
+        multi-valued relation, every row may be repeated and all of them count
+        distinct primary keys.
+        """
+        if name == "used":
+            queryset = self.model._default_manager.all()
+        else:
+            queryset = changelist.get_facet_queryset(exclude=self)
+        distinct = any(
+            self.query_spawns_duplicates(query)
+            for _value, _label, query in self.lookup_choices
+        )
+        return queryset.order_by(), {
+            f"lookup_{index}": models.Count("pk", filter=query, distinct=distinct)
+            for index, (_value, _label, query) in enumerate(self.lookup_choices)
+        }
+
+    def get_counts_by_value(self, results: dict) -> dict:
+        return {
+            value: results[f"lookup_{index}"]
+            for index, (value, _label, _query) in enumerate(self.lookup_choices)
+            if f"lookup_{index}" in results
+        }
+
+    async def aprefetch(self, changelist):
+        for name in self.get_count_names():
+            if name not in self.facet_results:
+                queryset, aggregates = self.get_lookup_aggregates(changelist, name)
+                self.facet_results[name] = self.get_counts_by_value(
+                    await queryset.aaggregate(**aggregates) if aggregates else {},
+                )
+
+    def choices(self, changelist):
+        selected_value = self.value()
+        if self.show_all:
+            yield {
+                "selected": selected_value is None,
+                "query_string": changelist.get_query_string(
+                    remove=[self.parameter_name],
+                ),
+                "display": "All",
+            }
+        counts = {
+            name: self.get_lookup_counts(changelist, name)
+            for name in self.get_count_names()
+        }
+        for value, label, _query in self.lookup_choices:
+            if (
+                "used" in counts
+                and not counts["used"].get(value)
+                and value != selected_value
+            ):
+                continue
+            choice = {
+                "value": value,
+                "selected": value == selected_value,
+                "query_string": changelist.get_query_string(
+                    {self.parameter_name: value},
+                ),
+                "display": label,
+            }
+            if "counts" in counts:
+                choice["count"] = counts["counts"].get(value, 0)
+            yield choice
+
 
 class FieldListViewFilter(ListViewFilter):
-    """Filter for simple choice fields. Doesn't allow for multiple choice fields."""
+    """Filter for simple choice fields.
+
+    With ``multiple`` (or ``FILTERVIEW_MULTIPLE_CHOICE``) set, choice links
+    toggle their value in a ``__in`` parameter whose values are joined with
+    ``list_separator``, so several values can be selected and are matched with
+    a single ``IN`` clause.
+
+    With ``narrow_choices`` (or ``FILTERVIEW_NARROW_CHOICES``) set, only values
+    found in the view's queryset with the other active filters applied are
+    listed. That queryset is used as a subquery, so the object list is never
+    loaded to do this."""
 
     _field_list_filters = []
     _take_priority_index = 0
     list_separator = ","
+    cache_timeout = 300
+    multiple = False
+    narrow_choices = False
+    narrowing_queryset = None
+    lookup_val = None
+    lookup_val_in = None
+    setting_attributes = {
+        **ListViewFilter.setting_attributes,
+        "cache_timeout": "CACHE_TIMEOUT",
+        "multiple": "MULTIPLE_CHOICE",
+        "narrow_choices": "NARROW_CHOICES",
+    }
 
     def __init__(self, field, request, params, model, field_path):
         self.field = field
         self.field_path = field_path
+        self.model = model
         self.title = getattr(field, "verbose_name", field_path)
+        self.spawns_duplicates = lookup_spawns_duplicates(
+            model._meta,
+            field_path or field.name,
+        )
         super().__init__(request, params, model)
         for p in self.expected_parameters():
             if p in params:
                 value = params.pop(p)
+                if p.endswith("__in"):
+                    self.used_parameters[p] = self.split_lookup_value(value)
+                    continue
                 self.used_parameters[p] = prepare_lookup_value(
                     p,
                     value,
                     # , self.list_separator ### added in a future version of Django
                 )
 
+    @property
+    def key(self) -> str:
+        return self.field_path or self.field.name
+
+    def normalize_parameter(self, name: str, value: str) -> str:
+        """Coerce <value> with the field, sorting and deduplicating ``__in`` values."""
+        if name.endswith("__isnull"):
+            return str(prepare_lookup_value(name, value))
+        if name.endswith("__in"):
+            values = {self.normalize_value(v) for v in self.split_lookup_value(value)}
+            return self.list_separator.join(sorted(values))
+        return self.normalize_value(value)
+
+    def normalize_value(self, value: str) -> str:
+        """Return <value> as converted by the field it's compared with."""
+        field = getattr(self.field, "target_field", self.field)
+        try:
+            return str(field.to_python(value))
+        except ValidationError:
+            # Left for queryset() to report.
+            return value
+
+    def split_lookup_value(self, value: str) -> list:
+        """Return the values of a ``__in`` parameter, split on ``list_separator``."""
+        return [v for v in value.split(self.list_separator) if v]
+
+    @property
+    def selected_values(self) -> list:
+        """Return the selected values (as strings) from the exact and in params."""
+        values = []
+        if self.lookup_val is not None:
+            values.append(self.lookup_val)
+        if self.lookup_val_in is not None:
+            values.extend(self.split_lookup_value(self.lookup_val_in))
+        return list(dict.fromkeys(values))
+
+    def choice_query_string(self, changelist, value):
+        """Return the link of the choice for <value>.
+
+        Selects only <value>, or toggles it in the ``__in`` parameter if
+        ``multiple`` is set.
+        """
+        if not self.multiple:
+            return changelist.get_query_string(
+                {self.lookup_kwarg: value},
+                [self.lookup_kwarg_isnull, self.lookup_kwarg_in],
+            )
+        value = str(value)
+        values = self.selected_values
+        if value in values:
+            values.remove(value)
+        else:
+            values.append(value)
+        return changelist.get_query_string(
+            {
+                self.lookup_kwarg: None,
+                self.lookup_kwarg_in: self.list_separator.join(sorted(values)) or None,
+            },
+            [self.lookup_kwarg_isnull],
+        )
+
     def has_output(self):
         return True
 
+    def narrow(self, changelist):
+        """Limit choices to values found in <changelist>'s filtered queryset.
+
+        Called by FilterViewMixin once every filter spec exists, if
+        ``narrow_choices`` is set. Subclasses reset anything already built
+        from the whole table.
+
+        :param changelist: View providing ``get_facet_queryset()``
+        :type changelist: FilterViewMixin
+        """
+        self.narrowing_queryset = changelist.get_facet_queryset(exclude=self)
+
     def queryset(self, request, queryset):
+        """Return <queryset> filtered by the used parameters.
+
+        If the field path spans a multi-valued relation, the lookup is done in
+        a ``pk__in`` subquery so rows matching several related objects aren't
+        duplicated, without a ``DISTINCT`` over the whole queryset.
+        """
+        if not self.used_parameters:
+            return queryset
         try:
+            if self.spawns_duplicates:
+                matches = queryset.model._default_manager.filter(
+                    **self.used_parameters,
+                )
+                return queryset.filter(pk__in=matches.values("pk"))
             return queryset.filter(**self.used_parameters)
         except (ValueError, ValidationError) as err:
             raise IncorrectLookupParameters(err) from err
 
+    def get_facet_querysets(self, changelist):
+        facets = super().get_facet_querysets(changelist)
+        if self.show_facets:
+            facets["counts"] = self.get_counts_queryset(changelist)
+        return facets
+
+    def get_counts_queryset(self, changelist):
+        queryset = changelist.get_facet_queryset(exclude=self)
+        distinct = lookup_spawns_duplicates(queryset.model._meta, self.field_path)
+        return facet_queryset(queryset, self.field_path, distinct=distinct)
+
+    def get_facet_counts(self, changelist):
+        """Return a dict of ``{value: count}`` for the filtered field.
+
+        Counts are taken over the view's queryset with every filter except this
+        one applied, using a single ``GROUP BY`` query.
+
+        :param changelist: View providing ``get_facet_queryset()``
+        :type changelist: FilterViewMixin
+        """
+        return self.get_facet_result(
+            "counts",
+            lambda: self.get_counts_queryset(changelist),
+        )
+
+    def get_cache_models(self):
+        """Return the models whose changes invalidate the cached choices."""
+        return [self.field.model]
+
+    def get_cache_key_parts(self) -> list:
+        """Return the attributes the cached choices depend on."""
+        return [
+            f"{self.__class__.__module__}.{self.__class__.__qualname__}",
+            self.model._meta.label_lower,
+            self.field_path,
+            self.show_unused_filters,
+        ]
+
+    def get_cache_key(self):
+        return get_cache_key(self.get_cache_key_parts(), self.get_cache_models())
+
+    def get_cached_choices(self):
+        """Return the cached choice list, or None if missing or not enabled."""
+        # Narrowed choices depend on the other filters, so they aren't cached.
+        if get_choices_cache() is None or self.narrow_choices:
+            return None
+        return get_choices_cache().get(self.get_cache_key())
+
+    def set_cached_choices(self, choices):
+        """Cache <choices> if ``FILTERVIEW_CACHE`` is set."""
+        if get_choices_cache() is not None and not self.narrow_choices:
+            get_choices_cache().set(self.get_cache_key(), choices, self.cache_timeout)
+
+    def add_facet_count(self, choice, changelist, value):
+        """Add a ``count`` key to <choice> for <value> if facets are enabled."""
+        if self.show_facets:
+            choice["count"] = self.get_facet_counts(changelist).get(value, 0)
+        return choice
+
     @classmethod
     def register(cls, test, list_filter_class, take_priority=False):
         if take_priority:
+            # This is to allow overriding the default filters for certain types
+            # of fields with some custom filters. The first found in the list
+            # is used in priority.
             cls._field_list_filters.insert(
                 cls._take_priority_index,
                 (test, list_filter_class),
             )
+            cls._take_priority_index += 1
+        else:
             cls._field_list_filters.append((test, list_filter_class))
 
     @classmethod
-    def create(cls, field, request, params, model, field_path):
+    def get_filter_class(cls, field):
+        """Return the first registered filter class whose test passes for <field>."""
         for test, list_filter_class in cls._field_list_filters:
             if test(field):
-                return list_filter_class(
-                    field,
-                    request,
-                    params,
-                    model,
-                    field_path=field_path,
-                )
+                return list_filter_class
+
+    @classmethod
+    def create(cls, field, request, params, model, field_path):
+        list_filter_class = cls.get_filter_class(field)
+        if list_filter_class is not None:
+            return list_filter_class(
+                field,
+                request,
+                params,
+                model,
+                field_path=field_path,
+            )
 
 
 class RelatedFieldListViewFilter(FieldListViewFilter):
     """
     For model fields that use a ForeignKey relationship.
-    Not for m2m fields."""
+    Not for m2m fields.
+
+    Choices are labelled with ``str()`` of each related object unless
+    ``label_field`` (or ``FILTERVIEW_RELATED_LABEL_FIELDS``) is set, in which
+    case labels are read with ``values_list()`` without building model
+    instances. ``label_field`` may be a field name, a list of field names joined
+    with ``label_separator``, or an expression such as ``Concat``."""
 
     empty_value_display = "--"
+    label_field = None
+    label_separator = " "
 
     def __init__(self, field, request, params, model, field_path):
         other_model = get_model_from_relation(field)
         self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        self.lookup_kwarg_in = f"{field_path}__{field.target_field.name}__in"
         self.lookup_kwarg_isnull = "%s__isnull" % field_path
         self.lookup_val = params.get(self.lookup_kwarg)
+        self.lookup_val_in = params.get(self.lookup_kwarg_in)
         self.lookup_val_isnull = params.get(self.lookup_kwarg_isnull)
         super().__init__(field, request, params, model, field_path)
-        self.lookup_choices = self.field_choices(field, request)
+        self.request = request
+        self._lookup_choices = None
         if hasattr(field, "verbose_name"):
             self.lookup_title = field.verbose_name
         else:
@@ -176,6 +632,17 @@ class RelatedFieldListViewFilter(FieldListViewFilter):
         self.title = self.lookup_title
         # self.empty_value_display = model_admin.get_empty_value_display()
 
+    @property
+    def lookup_choices(self):
+        # Built on first access so AsyncFilterViewMixin can load them first.
+        if self._lookup_choices is None:
+            self._lookup_choices = self.field_choices(self.field, self.request)
+        return self._lookup_choices
+
+    @lookup_choices.setter
+    def lookup_choices(self, value):
+        self._lookup_choices = value
+
     @property
     def include_empty_choice(self):
         """
@@ -185,11 +652,26 @@ class RelatedFieldListViewFilter(FieldListViewFilter):
         return self.field.null or (self.field.is_relation and self.field.many_to_many)
 
     def has_output(self):
+        if self._lookup_choices is None and self.narrow_choices:
+            # Not known until the other filters exist; see narrow().
+            return True
         extra = 1 if self.include_empty_choice else 0
         return len(self.lookup_choices) + extra > 1
 
+    def narrow(self, changelist):
+        super().narrow(changelist)
+        self._lookup_choices = None
+
+    async def aload_choices(self, request):
+        if self._lookup_choices is None and not self.narrow_choices:
+            self._lookup_choices = await self.afield_choices(self.field, request)
+
+    async def aprefetch(self, changelist):
+        if self._lookup_choices is None:
+            self._lookup_choices = await self.afield_choices(self.field, self.request)
+
     def expected_parameters(self):
-        return [self.lookup_kwarg, self.lookup_kwarg_isnull]
+        return [self.lookup_kwarg, self.lookup_kwarg_in, self.lookup_kwarg_isnull]
 
     # def field_admin_ordering(self, field, request, model_admin):
     #     """
@@ -200,26 +682,210 @@ class RelatedFieldListViewFilter(FieldListViewFilter):
     #         return related_admin.get_ordering(request)
     #     return ()
 
+    def get_cache_models(self):
+        return [self.field.model, self.field.related_model]
+
+    def get_cache_key_parts(self) -> list:
+        return [*super().get_cache_key_parts(), self.get_label_expression()]
+
     def field_choices(self, field: models.Field, request):
+        choices = self.get_cached_choices()
+        if choices is None:
+            choices = self.label_choices(self.get_choices_queryset(field, request))
+            self.set_cached_choices(choices)
+        return choices
+
+    async def afield_choices(self, field: models.Field, request):
+        """Async counterpart of ``field_choices()``."""
+        choices = self.get_cached_choices()
+        if choices is None:
+            queryset = self.get_choices_queryset(field, request)
+            choices = await self.alabel_choices(queryset)
+            self.set_cached_choices(choices)
+        return choices
+
+    def get_choices_queryset(self, field: models.Field, request):
+        """Return the related objects to list as choices."""
         model = field.model
         parent_model = field.related_model
-        p_qs = parent_model.objects.all()
+        qs = parent_model.objects.all()
 
-        if not self.show_unused_filters:
+        if self.narrowing_queryset is not None:
+            matched_fields = self.narrowing_queryset.order_by().values(self.field_path)
+            qs = qs.filter(**{f"{field.target_field.name}__in": matched_fields})
+        elif not self.show_unused_filters:
             try:
                 matched_fields = (
                     model.objects.order_by()
                     .values_list(field.name, flat=True)
                     .distinct()
                 )
-                qs = p_qs.filter(id__in=matched_fields)
-
-                qs = [(x.pk, str(x)) for x in qs]
+                qs = qs.filter(pk__in=matched_fields)
             except Exception as err:
                 messages.warning(request, message=err)
 
         return qs
 
+    def get_label_expression(self):
+        """Return the expression used for choice labels, or None for ``str()``."""
+        label_field = self.label_field
+        if label_field is None:
+            label_fields = {
+                label.lower(): value
+                for label, value in get_setting(
+                    f"{FILTER_PREFIX}RELATED_LABEL_FIELDS",
+                    {},
+                ).items()
+            }
+            label_field = label_fields.get(self.field.related_model._meta.label_lower)
+
+        if label_field is None:
+            return None
+        if isinstance(label_field, str):
+            return models.F(label_field)
+        if isinstance(label_field, (list, tuple)):
+            parts = []
+            for field_name in label_field:
+                if parts:
+                    parts.append(models.Value(self.label_separator))
+                parts.append(models.F(field_name))
+            if len(parts) == 1:
+                return parts[0]
+            return Concat(*parts, output_field=models.CharField())
+        return label_field
+
+    def get_label_rows(self, qs):
+        """Return <qs> as ``(pk, label)`` rows, or None if labels use ``str()``."""
+        expression = self.get_label_expression()
+        if expression is None:
+            return None
+        return qs.annotate(listview_filter_label=expression).values_list(
+            "pk",
+            "listview_filter_label",
+        )
+
+    def label_choices(self, qs):
+        """Return a list of ``(pk, label)`` for the related objects in <qs>."""
+        rows = self.get_label_rows(qs)
+        if rows is None:
+            return [(x.pk, str(x)) for x in qs]
+        return [
+            (pk, self.empty_value_display if label is None else str(label))
+            for pk, label in rows
+        ]
+
+    async def alabel_choices(self, qs):
+        """Async counterpart of ``label_choices()``."""
+        rows = self.get_label_rows(qs)
+        if rows is None:
+            return [(x.pk, str(x)) async for x in qs]
+        return [
+            (pk, self.empty_value_display if label is None else str(label))
+            async for pk, label in rows
+        ]
+
+    def get_pending_choices_queryset(self):
+        """Return the queryset the choices still have to be read from, or None.
+
+        Cached choices are used directly, and narrowed ones wait for
+        ``narrow()``. See ``load_choices_together()``.
+        """
+        if self._lookup_choices is not None:
+            return None
+        if self.narrow_choices and self.narrowing_queryset is None:
+            return None
+        choices = self.get_cached_choices()
+        if choices is not None:
+            self._lookup_choices = choices
+            return None
+        return self.get_choices_queryset(self.field, self.request)
+
+    def set_loaded_choices(self, choices):
+        self._lookup_choices = choices
+        self.set_cached_choices(choices)
+
+    @classmethod
+    def get_choice_groups(cls, filter_specs) -> list:
+        """Return the pending choices of <filter_specs>, grouped by related model.
+
+        Each group is a list of ``(filter_spec, queryset)`` whose choices can
+        be read with one query, as they have the same related model and label.
+        """
+        groups = {}
+        for filter_spec in filter_specs:
+            if not isinstance(filter_spec, RelatedFieldListViewFilter):
+                continue
+            queryset = filter_spec.get_pending_choices_queryset()
+            if queryset is None:
+                continue
+            key = (
+                queryset.db,
+                queryset.model,
+                repr(filter_spec.get_label_expression()),
+            )
+            groups.setdefault(key, []).append((filter_spec, queryset))
+        return list(groups.values())
+
+    @staticmethod
+    def get_group_rows(group: list):
+        """Return the rows of <group> from ``combine_choice_querysets()``."""
+        filter_spec = group[0][0]
+        queryset = combine_choice_querysets([queryset for _, queryset in group])
+        flags = [f"listview_choice_{index}" for index in range(len(group))]
+        rows = filter_spec.get_label_rows(queryset)
+        if rows is None:
+            return queryset
+        return rows.values_list("pk", "listview_filter_label", *flags)
+
+    @staticmethod
+    def set_group_choices(group: list, rows):
+        """Hand the rows read by ``get_group_rows()`` to each filter of <group>."""
+        flags = [f"listview_choice_{index}" for index in range(len(group))]
+        labelled = []
+        for row in rows:
+            if isinstance(row, tuple):
+                pk, label, *members = row
+            else:
+                pk, label = row.pk, str(row)
+                members = [getattr(row, flag) for flag in flags]
+            if label is None:
+                label = group[0][0].empty_value_display
+            labelled.append((pk, str(label), members))
+        for index, (filter_spec, _) in enumerate(group):
+            filter_spec.set_loaded_choices(
+                [(pk, label) for pk, label, members in labelled if members[index]],
+            )
+
+    @classmethod
+    def load_choices_together(cls, filter_specs):
+        """Read the pending choices of <filter_specs>, one query per related model.
+
+        Related filters on the same model (e.g. "author" and "editor") are
+        read with a single ``pk__in`` query rather than one query each.
+        """
+        for group in cls.get_choice_groups(filter_specs):
+            if len(group) == 1:
+                filter_spec, queryset = group[0]
+                filter_spec.set_loaded_choices(filter_spec.label_choices(queryset))
+            else:
+                cls.set_group_choices(group, list(cls.get_group_rows(group)))
+
+    @classmethod
+    async def aload_choices_together(cls, filter_specs):
+        """Async counterpart of ``load_choices_together()``."""
+
+        async def load(group):
+            if len(group) == 1:
+                filter_spec, queryset = group[0]
+                choices = await filter_spec.alabel_choices(queryset)
+                filter_spec.set_loaded_choices(choices)
+            else:
+                rows = [row async for row in cls.get_group_rows(group)]
+                cls.set_group_choices(group, rows)
+
+        groups = cls.get_choice_groups(filter_specs)
+        await asyncio.gather(*(load(group) for group in groups))
+
     def choices(self, changelist):
         """Return dictionaries for each choice in a filter.
 
@@ -227,35 +893,137 @@ class RelatedFieldListViewFilter(FieldListViewFilter):
         """
         if self.show_all:
             yield {
-                "selected": self.lookup_val is None and not self.lookup_val_isnull,
+                "selected": not self.selected_values and not self.lookup_val_isnull,
                 "query_string": changelist.get_query_string(
-                    remove=[self.lookup_kwarg, self.lookup_kwarg_isnull],
+                    remove=[
+                        self.lookup_kwarg,
+                        self.lookup_kwarg_in,
+                        self.lookup_kwarg_isnull,
+                    ],
                 ),
                 "display": "All",
             }
         for pk_val, val in self.lookup_choices:
-            yield {
-                "selected": self.lookup_val == str(pk_val),
-                "query_string": changelist.get_query_string(
-                    {self.lookup_kwarg: pk_val},
-                    [self.lookup_kwarg_isnull],
-                ),
+            choice = {
+                "value": pk_val,
+                "selected": str(pk_val) in self.selected_values,
+                "query_string": self.choice_query_string(changelist, pk_val),
                 "display": val,
             }
+            yield self.add_facet_count(choice, changelist, pk_val)
         if self.include_empty_choice:
-            yield {
+            choice = {
+                "value": None,
                 "selected": bool(self.lookup_val_isnull),
                 "query_string": changelist.get_query_string(
                     {self.lookup_kwarg_isnull: "True"},
-                    [self.lookup_kwarg],
+                    [self.lookup_kwarg, self.lookup_kwarg_in],
                 ),
                 "display": self.empty_value_display,
             }
+            yield self.add_facet_count(choice, changelist, None)
 
 
 FieldListViewFilter.register(lambda f: f.remote_field, RelatedFieldListViewFilter)
 
 
+class RelatedFieldAutocompleteListViewFilter(RelatedFieldListViewFilter):
+    """
+    For ForeignKey fields whose related model has too many rows to list.
+
+    Only the selected value is rendered. A last choice with an ``autocomplete``
+    key holds the URL of the view's
+    :class:`~django_listview_filters.views.FilterAutocompleteView` so other
+    values can be searched from the template.
+    """
+
+    search_fields = None
+    search_display = "Search…"
+
+    def has_output(self):
+        return True
+
+    def field_choices(self, field: models.Field, request):
+        if not self.selected_values:
+            return []
+        return self.label_choices(self.get_choices_queryset(field, request))
+
+    async def afield_choices(self, field: models.Field, request):
+        if not self.selected_values:
+            return []
+        return await self.alabel_choices(self.get_choices_queryset(field, request))
+
+    def get_pending_choices_queryset(self):
+        if self._lookup_choices is not None:
+            return None
+        if not self.selected_values:
+            self._lookup_choices = []
+            return None
+        return self.get_choices_queryset(self.field, self.request)
+
+    def set_loaded_choices(self, choices):
+        # Only the selected values are listed, so they aren't cached.
+        self._lookup_choices = choices
+
+    def get_choices_queryset(self, field: models.Field, request):
+        """Return the selected related objects."""
+        qs = field.related_model._default_manager.all()
+        try:
+            return qs.filter(
+                **{f"{field.target_field.name}__in": self.selected_values},
+            )
+        except (ValueError, ValidationError):
+            return qs.none()
+
+    def get_search_fields(self):
+        """Return the related model fields searched with ``icontains``.
+
+        Defaults to every text field of the related model.
+        """
+        if self.search_fields is not None:
+            return self.search_fields
+        return [
+            f.name
+            for f in self.field.related_model._meta.concrete_fields
+            if isinstance(f, (models.CharField, models.TextField))
+        ]
+
+    def get_autocomplete_queryset(self, request, term: str):
+        """Return the related objects matching <term>.
+
+        :param term: Text searched for in ``get_search_fields()``
+        :type term: str
+        """
+        related_model = self.field.related_model
+        qs = related_model._default_manager.all()
+
+        if not self.show_unused_filters:
+            qs = qs.filter(
+                pk__in=self.field.model._default_manager.values(self.field.name),
+            )
+        if term:
+            query = models.Q()
+            for field_name in self.get_search_fields():
+                query |= models.Q(**{f"{field_name}__icontains": term})
+            qs = qs.filter(query)
+
+        return qs.order_by(*(related_model._meta.ordering or ["pk"]))
+
+    def choices(self, changelist):
+        yield from super().choices(changelist)
+        url = getattr(changelist, "autocomplete_url", None)
+        yield {
+            "selected": False,
+            "query_string": changelist.get_query_string(),
+            "display": self.search_display,
+            "autocomplete": {
+                "url": str(url) if url is not None else None,
+                "field": self.field_path,
+                "lookup_kwarg": self.lookup_kwarg,
+            },
+        }
+
+
 class ChoicesFieldListViewFilter(FieldListViewFilter):
     """
     For model fields that use dropdowns populated by static
@@ -263,127 +1031,569 @@ class ChoicesFieldListViewFilter(FieldListViewFilter):
 
     def __init__(self, field, request, params, model, field_path):
         self.lookup_kwarg = "%s__exact" % field_path
+        self.lookup_kwarg_in = "%s__in" % field_path
         self.lookup_kwarg_isnull = "%s__isnull" % field_path
         self.lookup_val = params.get(self.lookup_kwarg)
+        self.lookup_val_in = params.get(self.lookup_kwarg_in)
         self.lookup_val_isnull = params.get(self.lookup_kwarg_isnull)
-        self.lookup_choices = self.get_choices(field)
         super().__init__(field, request, params, model, field_path)
+        self._lookup_choices = None
+
+    @property
+    def lookup_choices(self):
+        # Built on first access so FilterViewMixin can prefetch the used values
+        # along with the other filters' facets.
+        if self._lookup_choices is None:
+            self._lookup_choices = self.get_choices(self.field)
+        return self._lookup_choices
+
+    @lookup_choices.setter
+    def lookup_choices(self, value):
+        self._lookup_choices = value
 
     def expected_parameters(self):
-        return [self.lookup_kwarg, self.lookup_kwarg_isnull]
+        return [self.lookup_kwarg, self.lookup_kwarg_in, self.lookup_kwarg_isnull]
+
+    def narrow(self, changelist):
+        super().narrow(changelist)
+        self._lookup_choices = None
+        self.facet_results.pop("used", None)
+
+    def get_facet_querysets(self, changelist):
+        facets = super().get_facet_querysets(changelist)
+        if not self.show_unused_filters or self.narrowing_queryset is not None:
+            facets["used"] = self.get_used_queryset(self.field)
+        return facets
+
+    def get_used_queryset(self, field):
+        if self.narrowing_queryset is not None:
+            return facet_queryset(self.narrowing_queryset, self.field_path)
+        return facet_queryset(field.model._default_manager.all(), field.name)
+
+    def get_used_values(self, field):
+        """Return the set of values of <field> that are stored in the database.
+
+        Resolved with a single grouped query rather than one query per choice.
+        """
+        return set(
+            self.get_facet_result("used", lambda: self.get_used_queryset(field)),
+        )
 
     def get_choices(self, field):
-        model = field.model
         qs = field.flatchoices
 
-        if not self.show_unused_filters:
-            try:
-                qs_dict = dict(qs)
-                new_list = []
-                for value in qs_dict:
-                    kwargs = {field.name: value}
-                    valid = model.objects.filter(**kwargs).exists()
-                    if valid:
-                        new_list.append((value, qs_dict[value]))
-                qs = new_list
-            except Exception:
-                raise
-                # messages.warning(self.request, message=err)
+        if not self.show_unused_filters or self.narrowing_queryset is not None:
+            used_values = self.get_used_values(field)
+            qs = [(value, title) for value, title in qs if value in used_values]
 
         return qs
 
     def choices(self, changelist):
         if self.show_all:
             yield {
-                "selected": self.lookup_val is None,
+                "selected": not self.selected_values,
                 "query_string": changelist.get_query_string(
-                    remove=[self.lookup_kwarg, self.lookup_kwarg_isnull],
+                    remove=[
+                        self.lookup_kwarg,
+                        self.lookup_kwarg_in,
+                        self.lookup_kwarg_isnull,
+                    ],
                 ),
                 "display": "All",
             }
         none_title = ""
-        for lookup, title in self.get_choices(self.field):
+        for lookup, title in self.lookup_choices:
             if lookup is None:
                 none_title = title
                 continue
-            yield {
-                "selected": str(lookup) == self.lookup_val,
-                "query_string": changelist.get_query_string(
-                    {self.lookup_kwarg: lookup},
-                    [self.lookup_kwarg_isnull],
-                ),
+            choice = {
+                "value": lookup,
+                "selected": str(lookup) in self.selected_values,
+                "query_string": self.choice_query_string(changelist, lookup),
                 "display": title,
             }
+            yield self.add_facet_count(choice, changelist, lookup)
         if none_title:
-            yield {
+            choice = {
+                "value": None,
                 "selected": bool(self.lookup_val_isnull),
                 "query_string": changelist.get_query_string(
                     {self.lookup_kwarg_isnull: "True"},
-                    [self.lookup_kwarg],
+                    [self.lookup_kwarg, self.lookup_kwarg_in],
                 ),
                 "display": none_title,
             }
+            yield self.add_facet_count(choice, changelist, None)
 
 
 FieldListViewFilter.register(lambda f: bool(f.choices), ChoicesFieldListViewFilter)
 
 
+class RangeListViewFilter(FieldListViewFilter):
+    """
+    Base class for filtering a field on a range of values.
+
+    Presets from ``get_presets()`` and a custom range (a last choice with a
+    ``range`` key holding the parameter names and current values, for the
+    template to render inputs) compile to ``<field>__gte`` and ``<field>__lt``
+    lookups, which can use an index on the field. With facets enabled, every
+    preset is counted in a single aggregate query.
+    """
+
+    empty_display = "No value"
+    not_empty_display = "Has value"
+    range_display = "Custom range"
+
+    def __init__(self, field, request, params, model, field_path):
+        self.lookup_kwarg_since = "%s__gte" % field_path
+        self.lookup_kwarg_until = "%s__lt" % field_path
+        self.lookup_kwarg_isnull = "%s__isnull" % field_path
+        for name in self.expected_parameters():
+            # A range form submitted with one side left blank.
+            if name in params and not params[name].strip():
+                del params[name]
+        self.lookup_val_since = params.get(self.lookup_kwarg_since)
+        self.lookup_val_until = params.get(self.lookup_kwarg_until)
+        self.lookup_val_isnull = params.get(self.lookup_kwarg_isnull)
+        super().__init__(field, request, params, model, field_path)
+        for name in (self.lookup_kwarg_since, self.lookup_kwarg_until):
+            if name in self.used_parameters:
+                value = self.clean_bound(self.used_parameters[name])
+                if value is None:
+                    self.drop_bound(name)
+                else:
+                    self.used_parameters[name] = value
+        self.presets = self.get_presets()
+
+    def clean_bound(self, value: str):
+        """Return the bound <value> converted by the field's form field.
+
+        Returns None if <value> isn't valid, so it's ignored rather than
+        failing the whole request.
+        """
+        field = self.field.formfield() or self.field
+        try:
+            return field.to_python(value)
+        except ValidationError:
+            return None
+
+    def drop_bound(self, name: str):
+        del self.used_parameters[name]
+        if name == self.lookup_kwarg_since:
+            self.lookup_val_since = None
+        else:
+            self.lookup_val_until = None
+
+    def normalize_parameter(self, name: str, value: str) -> str:
+        if name != self.lookup_kwarg_isnull and self.clean_bound(value) is None:
+            # Dropped from the canonical URL, as it isn't applied.
+            return None
+        return super().normalize_parameter(name, value)
+
+    def get_presets(self):
+        """Return a list of ``(title, since, until)``; a bound may be None."""
+        return []
+
+    def expected_parameters(self):
+        return [
+            self.lookup_kwarg_since,
+            self.lookup_kwarg_until,
+            self.lookup_kwarg_isnull,
+        ]
+
+    def get_range_params(self, since, until) -> dict:
+        return {
+            self.lookup_kwarg_since: None if since is None else str(since),
+            self.lookup_kwarg_until: None if until is None else str(until),
+        }
+
+    def get_range_q(self, since, until) -> models.Q:
+        query = models.Q()
+        if since is not None:
+            query &= models.Q(**{self.lookup_kwarg_since: since})
+        if until is not None:
+            query &= models.Q(**{self.lookup_kwarg_until: until})
+        return query
+
+    def get_facet_querysets(self, changelist):
+        # Counts are per preset rather than per value; see get_bucket_counts().
+        return {}
+
+    def get_bucket_counts(self, changelist):
+        """Return the number of objects in each preset, using a single query.
+
+        Counts are keyed ``bucket_<index>``, plus ``bucket_null`` and
+        ``bucket_not_null`` for nullable fields, and taken over the view's
+        queryset with every filter except this one applied. Each count is a
+        ``COUNT`` with a ``FILTER``/``CASE WHEN`` clause, so no values are
+        grouped or truncated.
+
+        :param changelist: View providing ``get_facet_queryset()``
+        :type changelist: FilterViewMixin
+        """
+        if "buckets" not in self.facet_results:
+            queryset, aggregates = self.get_bucket_aggregates(changelist)
+            self.facet_results["buckets"] = (
+                queryset.aggregate(**aggregates) if aggregates else {}
+            )
+        return self.facet_results["buckets"]
+
+    def get_bucket_aggregates(self, changelist):
+        """Return the queryset to count buckets on and its ``Count`` aggregates."""
+        queryset = changelist.get_facet_queryset(exclude=self).order_by()
+        distinct = lookup_spawns_duplicates(queryset.model._meta, self.field_path)
+        ranges = {
+            f"bucket_{index}": self.get_range_q(since, until)
+            for index, (_, since, until) in enumerate(self.presets)
+        }
+        if self.field.null:
+            ranges["bucket_null"] = models.Q(**{self.lookup_kwarg_isnull: True})
+            ranges["bucket_not_null"] = models.Q(**{self.lookup_kwarg_isnull: False})
+        return queryset, {
+            name: models.Count("pk", filter=query, distinct=distinct)
+            for name, query in ranges.items()
+        }
+
+    async def aprefetch(self, changelist):
+        if self.show_facets and "buckets" not in self.facet_results:
+            queryset, aggregates = self.get_bucket_aggregates(changelist)
+            self.facet_results["buckets"] = (
+                await queryset.aaggregate(**aggregates) if aggregates else {}
+            )
+
+    def add_bucket_count(self, choice, changelist, name):
+        """Add a ``count`` key to <choice> for bucket <name> if facets are enabled."""
+        if self.show_facets:
+            choice["count"] = self.get_bucket_counts(changelist)[name]
+        return choice
+
+    def choices(self, changelist):
+        selected_preset = False
+        if self.show_all:
+            yield {
+                "selected": not any(
+                    p in self.used_parameters for p in self.expected_parameters()
+                ),
+                "query_string": changelist.get_query_string(
+                    remove=self.expected_parameters(),
+                ),
+                "display": "All",
+            }
+        for index, (title, since, until) in enumerate(self.presets):
+            params = self.get_range_params(since, until)
+            selected = (
+                self.lookup_val_isnull is None
+                and self.lookup_val_since == params[self.lookup_kwarg_since]
+                and self.lookup_val_until == params[self.lookup_kwarg_until]
+            )
+            selected_preset = selected_preset or selected
+            choice = {
+                "value": [since, until],
+                "selected": selected,
+                "query_string": changelist.get_query_string(
+                    params,
+                    [self.lookup_kwarg_isnull],
+                ),
+                "display": title,
+            }
+            yield self.add_bucket_count(choice, changelist, f"bucket_{index}")
+        if self.field.null:
+            for value, title, name in (
+                ("True", self.empty_display, "bucket_null"),
+                ("False", self.not_empty_display, "bucket_not_null"),
+            ):
+                choice = {
+                    "selected": self.lookup_val_isnull == value,
+                    "query_string": changelist.get_query_string(
+                        {self.lookup_kwarg_isnull: value},
+                        [self.lookup_kwarg_since, self.lookup_kwarg_until],
+                    ),
+                    "display": title,
+                }
+                if value == "True":
+                    choice["value"] = None
+                yield self.add_bucket_count(choice, changelist, name)
+        yield {
+            "selected": not selected_preset
+            and (
+                self.lookup_val_since is not None or self.lookup_val_until is not None
+            ),
+            "query_string": changelist.get_query_string(
+                remove=self.expected_parameters(),
+            ),
+            "display": self.range_display,
+            "range": {
+                "since_param": self.lookup_kwarg_since,
+                "until_param": self.lookup_kwarg_until,
+                "since": self.lookup_val_since,
+                "until": self.lookup_val_until,
+            },
+        }
+
+
+class DateRangeListViewFilter(RangeListViewFilter):
+    """
+    For date and datetime fields. Offers presets for today, the past 7 days,
+    this month and this year, computed in the current time zone.
+    """
+
+    def get_presets(self):
+        now = timezone.now()
+        if timezone.is_aware(now):
+            now = timezone.localtime(now)
+        if isinstance(self.field, models.DateTimeField):
+            today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        else:
+            today = now.date()
+        tomorrow = today + timedelta(days=1)
+        if today.month == 12:
+            next_month = today.replace(year=today.year + 1, month=1, day=1)
+        else:
+            next_month = today.replace(month=today.month + 1, day=1)
+        next_year = today.replace(year=today.year + 1, month=1, day=1)
+        return [
+            ("Today", today, tomorrow),
+            ("Past 7 days", today - timedelta(days=7), tomorrow),
+            ("This month", today.replace(day=1), next_month),
+            ("This year", today.replace(month=1, day=1), next_year),
+        ]
+
+
+class NumericRangeListViewFilter(RangeListViewFilter):
+    """
+    For integer, float and decimal fields.
+
+    Set ``buckets`` to a sorted list of boundaries to offer presets between
+    them, e.g. ``[10, 100]`` gives "< 10", "10 – 100" and "≥ 100". Without
+    ``buckets`` only the custom range is offered.
+    """
+
+    buckets = None
+
+    def get_presets(self):
+        bounds = list(self.buckets or [])
+        if not bounds:
+            return []
+        return [
+            (f"< {bounds[0]}", None, bounds[0]),
+            *(
+                (f"{low} – {high}", low, high)
+                for low, high in zip(bounds, bounds[1:])
+            ),
+            (f"≥ {bounds[-1]}", bounds[-1], None),
+        ]
+
+
+# Registered with priority, so they're tried before the related and choices
+# filters, and never reach AllValuesFieldListFilter.
+FieldListViewFilter.register(
+    lambda f: isinstance(f, models.DateField) and not f.choices,
+    DateRangeListViewFilter,
+    take_priority=True,
+)
+FieldListViewFilter.register(
+    lambda f: isinstance(
+        f,
+        (models.IntegerField, models.FloatField, models.DecimalField),
+    )
+    and not f.choices,
+    NumericRangeListViewFilter,
+    take_priority=True,
+)
+
+
 # This should be registered last, because it's a last resort. For example,
 # if a field is eligible to use the BooleanFieldListFilter, that'd be much
 # more appropriate, and the AllValuesFieldListFilter won't get used for it.
 class AllValuesFieldListFilter(FieldListViewFilter):
+    """
+    For any other field. Lists every distinct value of the field.
+
+    For fields with many distinct values, set ``max_choices`` (or
+    ``FILTERVIEW_MAX_CHOICES``) to only list the first values, ordered by
+    ``choices_order`` ("value" or "frequency"), followed by a choice with
+    ``"more": True``. Set ``stream_choices`` to read the values with
+    ``QuerySet.iterator()`` in chunks of ``chunk_size`` rather than loading them
+    all at once.
+    """
+
+    empty_value_display = "--"
+    more_display = "More…"
+    max_choices = None
+    choices_order = "value"
+    stream_choices = False
+    chunk_size = 2000
+    setting_attributes = {
+        **FieldListViewFilter.setting_attributes,
+        "max_choices": "MAX_CHOICES",
+    }
+
     def __init__(self, field, request, params, model, field_path):
         self.lookup_kwarg = field_path
+        self.lookup_kwarg_in = "%s__in" % field_path
         self.lookup_kwarg_isnull = "%s__isnull" % field_path
         self.lookup_val = params.get(self.lookup_kwarg)
+        self.lookup_val_in = params.get(self.lookup_kwarg_in)
         self.lookup_val_isnull = params.get(self.lookup_kwarg_isnull)
-        self.empty_value_display = self.empty_value_display
         parent_model, reverse_path = reverse_field_path(model, field_path)
         # Obey parent ModelAdmin queryset when deciding which options to show
         # if model == parent_model:
         #     queryset = model_admin.get_queryset(request)
         # else:
-        queryset = parent_model._default_manager.all()
-        self.lookup_choices = (
-            queryset.distinct().order_by(field.name).values_list(field.name, flat=True)
-        )
+        self.lookup_queryset = parent_model._default_manager.all()
+        self.lookup_field = field.name
         super().__init__(field, request, params, model, field_path)
+        self._lookup_choices = None
+        if not self.stream_choices:
+            self._lookup_choices = self.get_cached_choices()
+
+    @property
+    def lookup_choices(self):
+        if self._lookup_choices is None:
+            if "values" in self.facet_results:
+                self._lookup_choices = sorted(
+                    self.facet_results["values"],
+                    key=lambda value: (value is None, value),
+                )
+            elif self.max_choices is not None:
+                self._lookup_choices = list(self.get_lookup_queryset())
+            else:
+                self._lookup_choices = self.get_lookup_queryset()
+            if get_choices_cache() is not None and not self.stream_choices:
+                self._lookup_choices = list(self._lookup_choices)
+                self.set_cached_choices(self._lookup_choices)
+        return self._lookup_choices
+
+    @lookup_choices.setter
+    def lookup_choices(self, value):
+        self._lookup_choices = value
+
+    def get_lookup_queryset(self):
+        """Return the distinct values of the field in ``choices_order``.
+
+        When ``max_choices`` is set, one extra value is fetched so ``choices()``
+        knows whether to add the "more" choice.
+        """
+        field_name = self.lookup_field
+        queryset = self.lookup_queryset.order_by()
+        if self.choices_order == "frequency":
+            queryset = (
+                queryset.values(field_name)
+                .annotate(frequency=models.Count("pk"))
+                .order_by("-frequency", field_name)
+            )
+        else:
+            queryset = queryset.distinct().order_by(field_name)
+        queryset = queryset.values_list(field_name, flat=True)
+        if self.max_choices is not None:
+            queryset = queryset[: self.max_choices + 1]
+        return queryset
 
     def expected_parameters(self):
-        return [self.lookup_kwarg, self.lookup_kwarg_isnull]
+        return [self.lookup_kwarg, self.lookup_kwarg_in, self.lookup_kwarg_isnull]
+
+    def get_cache_models(self):
+        return [self.lookup_queryset.model]
+
+    def get_cache_key_parts(self) -> list:
+        return [*super().get_cache_key_parts(), self.max_choices, self.choices_order]
+
+    def use_values_facet(self) -> bool:
+        """Return True if the values can be read from a prefetched facet."""
+        # Ordered and limited lists can't be part of a UNION on every backend.
+        return (
+            self.max_choices is None
+            and self.choices_order == "value"
+            and not self.stream_choices
+        )
+
+    def get_facet_querysets(self, changelist):
+        facets = super().get_facet_querysets(changelist)
+        if self._lookup_choices is None and self.use_values_facet():
+            facets["values"] = facet_queryset(self.lookup_queryset, self.lookup_field)
+        return facets
+
+    async def aprefetch(self, changelist):
+        if self._lookup_choices is None and not self.use_values_facet():
+            # Streamed values are loaded as a list, in chunks.
+            queryset = self.get_lookup_queryset()
+            self._lookup_choices = [
+                value async for value in queryset.aiterator(chunk_size=self.chunk_size)
+            ]
+            if not self.stream_choices:
+                self.set_cached_choices(self._lookup_choices)
+
+    def narrow(self, changelist):
+        super().narrow(changelist)
+        self.lookup_queryset = self.narrowing_queryset
+        self.lookup_field = self.field_path
+        self._lookup_choices = None
+        self.facet_results.pop("values", None)
+
+    def get_counts_queryset(self, changelist):
+        if self.max_choices is None:
+            return super().get_counts_queryset(changelist)
+        # Only count the values that will be listed.
+        queryset = changelist.get_facet_queryset(exclude=self)
+        values = [value for value in self.lookup_choices if value is not None]
+        queryset = queryset.filter(
+            models.Q(**{f"{self.field_path}__in": values})
+            | models.Q(**{f"{self.field_path}__isnull": True}),
+        )
+        distinct = lookup_spawns_duplicates(queryset.model._meta, self.field_path)
+        return facet_queryset(queryset, self.field_path, distinct=distinct)
 
     def choices(self, changelist):
-        if self.get_show_all:
+        if self.show_all:
             yield {
-                "selected": self.lookup_val is None and self.lookup_val_isnull is None,
+                "selected": not self.selected_values and self.lookup_val_isnull is None,
                 "query_string": changelist.get_query_string(
-                    remove=[self.lookup_kwarg, self.lookup_kwarg_isnull],
+                    remove=[
+                        self.lookup_kwarg,
+                        self.lookup_kwarg_in,
+                        self.lookup_kwarg_isnull,
+                    ],
                 ),
                 "display": "All",
             }
         include_none = False
-        for val in self.lookup_choices:
-            if val is None:
+        has_more = False
+        lookup_choices = self.lookup_choices
+        if self.stream_choices and isinstance(lookup_choices, models.QuerySet):
+            lookup_choices = lookup_choices.iterator(chunk_size=self.chunk_size)
+        for index, lookup in enumerate(lookup_choices):
+            if self.max_choices is not None and index >= self.max_choices:
+                has_more = True
+                break
+            if lookup is None:
                 include_none = True
                 continue
-            val = str(val)
-            yield {
-                "selected": self.lookup_val == val,
-                "query_string": changelist.get_query_string(
-                    {self.lookup_kwarg: val},
-                    [self.lookup_kwarg_isnull],
-                ),
+            val = str(lookup)
+            choice = {
+                "value": lookup,
+                "selected": val in self.selected_values,
+                "query_string": self.choice_query_string(changelist, val),
                 "display": val,
             }
-        if include_none:
+            yield self.add_facet_count(choice, changelist, lookup)
+        if has_more:
             yield {
+                "selected": False,
+                "query_string": changelist.get_query_string(),
+                "display": self.more_display,
+                "more": True,
+            }
+        if include_none:
+            choice = {
+                "value": None,
                 "selected": bool(self.lookup_val_isnull),
                 "query_string": changelist.get_query_string(
                     {self.lookup_kwarg_isnull: "True"},
-                    [self.lookup_kwarg],
+                    [self.lookup_kwarg, self.lookup_kwarg_in],
                 ),
                 "display": self.empty_value_display,
             }
+            yield self.add_facet_count(choice, changelist, None)
 
 
 FieldListViewFilter.register(lambda f: True, AllValuesFieldListFilter)
@@ -1,60 +1,281 @@
-from django.db.models import Field
+import asyncio
+from contextlib import contextmanager, nullcontext
+from hashlib import md5
 
+from django.db import router
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models import Count, Field, Max
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponseRedirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext as _
 from django.views.generic import View
 from django.views.generic.list import MultipleObjectMixin
 
-from django.contrib.admin.utils import get_fields_from_path
-
-from furl import furl
+from django.contrib.admin.utils import NotRelationField, get_fields_from_path
 
-from ._helpers import get_setting
-from .filters import FieldListViewFilter, ListViewFilter
+from ._facets import arun_facet_querysets, run_facet_querysets
+from ._helpers import get_class_settings
+from ._instrumentation import profile_stage
+from ._querystring import QueryString
+from .pagination import (
+    ApproximateCountPaginator,
+    CursorPaginator,
+    acount_capped,
+    aestimate_count,
+    count_capped,
+    estimate_count,
+)
+from .filters import (
+    FieldListViewFilter,
+    ListViewFilter,
+    RelatedFieldListViewFilter,
+)
+from .signals import filter_spec_profiled
 from ._settings import (
-    FILTER_PREFIX,
     ALL_VAR,
     PAGE_VAR,
     SEARCH_VAR,
     ERROR_VAR,
-    IGNORED_PARAMS,
+    CURSOR_VAR,
 )
 
 
 class FilterViewMixin(MultipleObjectMixin, View):
-    def __init__(self) -> None:
-        self.all_var = get_setting("{}ALL_VAR".format(FILTER_PREFIX), ALL_VAR)
-        self.page_var = get_setting("{}PAGE_VAR".format(FILTER_PREFIX), PAGE_VAR)
-        self.search_var = get_setting("{}SEARCH_VAR".format(FILTER_PREFIX), SEARCH_VAR)
-        self.error_var = get_setting("{}ERROR_VAR".format(FILTER_PREFIX), ERROR_VAR)
-
-        extra_ignored_params = get_setting(
-            "{}EXTRA_IGNORED_PARAMS".format(FILTER_PREFIX), None
+    # URL of a FilterAutocompleteView for this view (may be reverse_lazy()).
+    autocomplete_url = None
+    # URL filter links point to (may be reverse_lazy()); the request's path if
+    # None.
+    filter_url = None
+    # Record time and queries per filter spec (see profile_filter()).
+    instrument_filters = False
+    # Answer If-None-Match/If-Modified-Since before building choices (see get()).
+    conditional_get = False
+    # Redirect requests whose query string isn't canonical (see get()).
+    canonical_redirect = False
+    # Don't load filter choices while filtering, for callers that only need the
+    # filtered queryset (see defer_has_output).
+    defer_filter_output = False
+    # Field of the model holding its last modification time, for validators.
+    updated_field = None
+    # Fields searched for the ``search_var`` parameter (see get_search_results()).
+    search_fields = ()
+    # SearchBackend class, or its dotted path.
+    search_backend = "django_listview_filters.search.IContainsSearchBackend"
+    all_var = ALL_VAR
+    page_var = PAGE_VAR
+    search_var = SEARCH_VAR
+    error_var = ERROR_VAR
+    cursor_var = CURSOR_VAR
+    # Paginate by cursor instead of page number (see paginate_queryset()).
+    cursor_pagination = False
+    # Ordering used for cursors; the queryset's if None.
+    cursor_ordering = None
+    # How the paginator counts objects: "exact", "capped" or "estimated" (see
+    # get_object_count()).
+    count_strategy = "exact"
+    # Counts above this are approximate unless ``count_strategy`` is "exact".
+    count_threshold = 10000
+    # Navigates past an approximate count (see get_object_count()).
+    paginator_class = ApproximateCountPaginator
+    # Field paths shown for each object, from which select_related(),
+    # prefetch_related() and only() are derived (see get_display_plan()).
+    list_display = ()
+    # Also load only the fields in ``list_display`` with only().
+    list_display_only = True
+    extra_ignored_params = None
+    # Attributes overridden by a ``FILTERVIEW_<NAME>`` setting, if set.
+    setting_attributes = {
+        "all_var": "ALL_VAR",
+        "page_var": "PAGE_VAR",
+        "search_var": "SEARCH_VAR",
+        "error_var": "ERROR_VAR",
+        "cursor_var": "CURSOR_VAR",
+        "cursor_pagination": "CURSOR_PAGINATION",
+        "count_strategy": "COUNT_STRATEGY",
+        "count_threshold": "COUNT_THRESHOLD",
+        "extra_ignored_params": "EXTRA_IGNORED_PARAMS",
+        "instrument_filters": "INSTRUMENT_FILTERS",
+        "conditional_get": "CONDITIONAL_GET",
+        "canonical_redirect": "CANONICAL_REDIRECT",
+        "search_backend": "SEARCH_BACKEND",
+    }
+
+    # Resolved list_filter entries, by (view class, model). See
+    # get_filter_plan().
+    _filter_plans = {}
+    # Loading derived from list_display, by (view class, model). See
+    # get_display_plan().
+    _display_plans = {}
+
+    # Set by get_paginator(), or counted ahead by AsyncFilterViewMixin.
+    object_count = None
+    count_is_approximate = False
+
+    def __init__(self, **kwargs) -> None:
+        self.__dict__.update(get_class_settings(type(self), self.setting_attributes))
+        super().__init__(**kwargs)
+
+        self.ignored_params = [
+            self.all_var,
+            self.page_var,
+            self.search_var,
+            self.error_var,
+            self.cursor_var,
+            *(self.extra_ignored_params or []),
+        ]
+        self.filter_profile = []
+
+    def get(self, request, *args, **kwargs):
+        """Return the list, or a redirect or 304 response if enabled.
+
+        With ``canonical_redirect`` (or ``FILTERVIEW_CANONICAL_REDIRECT``) set,
+        requests whose query string differs from ``get_base_query_string()``
+        are redirected to the canonical URL once the filter specs exist.
+
+        With ``conditional_get`` (or ``FILTERVIEW_CONDITIONAL_GET``) set, the
+        ETag from ``get_validators()`` is checked against the request's
+        ``If-None-Match`` header once the queryset is filtered. Filter choices,
+        pagination and rendering only happen if the response isn't a 304, and
+        the validators are added to it. ``If-Modified-Since`` alone never gives
+        a 304, as the latest modification time doesn't change when rows leave
+        the filtered set.
+        """
+        if not self.defer_has_output:
+            return super().get(request, *args, **kwargs)
+
+        self.object_list = self.get_queryset()
+        if self.canonical_redirect:
+            canonical_url = self.get_canonical_url()
+            if canonical_url is not None:
+                return HttpResponseRedirect(canonical_url)
+        if self.conditional_get:
+            etag, last_modified = self.get_validators(self.object_list)
+            # Only the ETag is checked: the latest modification time can't tell
+            # that rows left the filtered set.
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+        self.drop_filter_specs_without_output()
+
+        if not self.get_allow_empty():
+            if self.get_paginate_by(self.object_list) is not None and hasattr(
+                self.object_list,
+                "exists",
+            ):
+                is_empty = not self.object_list.exists()
+            else:
+                is_empty = not self.object_list
+            if is_empty:
+                raise Http404(
+                    _("Empty list and “%(class_name)s.allow_empty” is False.")
+                    % {"class_name": self.__class__.__name__},
+                )
+        context = self.get_context_data()
+        response = self.render_to_response(context)
+        if self.conditional_get:
+            response = self.set_validators(response, etag, last_modified)
+        return response
+
+    @property
+    def defer_has_output(self) -> bool:
+        """Whether ``has_output()`` waits for ``drop_filter_specs_without_output()``.
+
+        ``has_output()`` may query, so it isn't run before a redirect or a 304,
+        nor when ``defer_filter_output`` is set (e.g. by the export view, which
+        never shows choices).
+        """
+        return (
+            self.defer_filter_output or self.conditional_get or self.canonical_redirect
         )
 
-        self.ignored_params = IGNORED_PARAMS
+    def get_canonical_url(self):
+        """Return the canonical URL of the request, or None if it already is."""
+        query_string = self.get_base_query_string()
+        if query_string.query == self.request.META.get("QUERY_STRING", ""):
+            return None
+        return query_string.build()
+
+    def get_validator_aggregates(self) -> dict:
+        if self.updated_field is None:
+            raise ImproperlyConfigured(
+                "{} requires an 'updated_field' when conditional_get is "
+                "enabled.".format(self.__class__.__name__),
+            )
+        return {"count": Count("pk"), "updated": Max(self.updated_field)}
 
-        if extra_ignored_params:
-            self.ignored_params += extra_ignored_params
+    def get_validators(self, queryset):
+        """Return the ETag and last-modified timestamp of the filtered <queryset>.
 
-        return super().__init__()
+        Uses one aggregate query for the number of rows and their latest
+        ``updated_field`` value. The ETag hashes those with the request's
+        sorted query parameters. Changes that don't touch ``updated_field``
+        (e.g. ``QuerySet.update()`` without setting it) or the filtered rows,
+        such as renaming a related object shown as a choice, aren't detected.
+
+        :param queryset: Filtered queryset
+        :type queryset: QuerySet
+        """
+        values = queryset.order_by().aggregate(**self.get_validator_aggregates())
+        return self.make_validators(values)
+
+    def make_validators(self, values: dict):
+        params = sorted(
+            (key, value)
+            for key, values in self.request.GET.lists()
+            for value in values
+        )
+        updated = values.get("updated")
+        digest = md5(
+            repr((params, values["count"], updated)).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        last_modified = int(updated.timestamp()) if updated is not None else None
+        return quote_etag(digest), last_modified
+
+    def set_validators(self, response, etag: str, last_modified: int = None):
+        response.headers["ETag"] = etag
+        if last_modified is not None:
+            response.headers["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def drop_filter_specs_without_output(self):
+        """Remove the specs whose ``has_output()`` is False.
+
+        With ``defer_has_output``, ``has_output()`` isn't checked while the
+        specs are created, so this is called once the response is known not to
+        be a redirect or a 304. Those specs' lookups still apply.
+        """
+        self.load_filter_choices(self.filter_specs)
+        self.filter_specs = [spec for spec in self.filter_specs if spec.has_output()]
+        self.has_filters = bool(self.filter_specs)
 
     """Add filtering context"""
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        fragment = furl(self.request.get_full_path())
+        query_string = self.get_base_query_string()
 
         # Get list of args; should be a good proxy for filters
         non_page_args = []
-        for arg in fragment.args:
-            if arg != "page":
+        for arg in query_string:
+            if arg not in (self.page_var, self.cursor_var):
                 non_page_args.append(arg)
 
         context["non_page_args"] = non_page_args
+        context["search_var"] = self.search_var
+        context["search_term"] = self.get_search_term()
 
         # Start generating actual lists and paths for filters
         filter_list = []
 
+        self.prefetch_facets()
+
         # for filter in self.filters:
         #     # filter_obj = PartRevisionFilter()
         #     objects, clear_filter_fragment = filter.filter_list(self.request)
@@ -62,39 +283,88 @@ class FilterViewMixin(MultipleObjectMixin, View):
 
         for filter in self.filter_specs:
             clear_filter_url = filter.clear_filter_string(self)
-            if isinstance(filter, FieldListViewFilter):
+            with self.profile_filter("choices", filter):
                 choices = filter.choices(self)
                 choices_list = []
                 for counter, choice in enumerate(choices):
                     choices_list.append(choice)
-                filter_list.append((filter.title, choices_list, clear_filter_url))
+            filter_list.append((filter.title, choices_list, clear_filter_url))
 
         context["filter_list"] = filter_list
 
-        # Create "clear filter" paths
-        new_fragment = fragment.copy()
+        page = context.get("page_obj")
+        if self.cursor_pagination and page is not None:
+            context.update(self.get_cursor_urls(page))
+        context["count_is_approximate"] = self.count_is_approximate
+        context["count_is_capped"] = self.count_is_capped
+
+        if self.instrument_filters:
+            context["filter_profile"] = self.filter_profile
 
-        size = new_fragment.args.size()
-        if size > 0 and not (
-            size == 1 and new_fragment.args.has_key("page")
-        ):  # Only offer "clear all" button if a non-page arg is present
-            context["clear_filter_fragment"] = new_fragment.path
+        # Create "clear filter" paths
+        if non_page_args:
+            # Only offer "clear all" button if a non-page arg is present
+            context["clear_filter_fragment"] = query_string.path
 
         return context
 
-    def get_params(self, request):
-        fragment = furl(request.get_full_path())
-        new_fragment = fragment.copy()
-        if self.page_var in new_fragment.args:
-            del new_fragment.args[self.page_var]
-        if self.error_var in new_fragment.args:
-            del new_fragment.args[self.error_var]
+    def get_facet_payload(self) -> dict:
+        """Return the filters and their choices as a JSON-serializable dict.
+
+        *Example:*
 
-        return dict(new_fragment.args)
+        .. code-block:: python
+
+            {
+                "filters": [
+                    {
+                        "key": "author",
+                        "title": "author",
+                        "clear_url": None,
+                        "choices": [
+                            {"label": "All", "url": "/books/", "selected": True},
+                            {"label": "Ann", "url": "/books/?author__id__exact=1",
+                             "value": 1, "selected": False, "count": 4},
+                        ],
+                    },
+                ],
+                "clear_url": None,
+            }
+
+        Values are Python objects, e.g. dates, so encode the payload with
+        :class:`~django.core.serializers.json.DjangoJSONEncoder`.
+        """
+        return {
+            "filters": list(self.iter_filter_payloads()),
+            "clear_url": self.get_clear_filter_url(),
+        }
+
+    def iter_filter_payloads(self):
+        """Yield ``get_payload()`` of each filter spec, prefetching facets first."""
+        self.prefetch_facets()
+        for filter_spec in self.filter_specs:
+            with self.profile_filter("choices", filter_spec):
+                payload = filter_spec.get_payload(self)
+            yield payload
+
+    def get_clear_filter_url(self):
+        """Return the URL without any parameter, or None if there are none."""
+        query_string = self.get_base_query_string()
+        if any(arg not in (self.page_var, self.cursor_var) for arg in query_string):
+            return query_string.path
+        return None
+
+    def get_params(self, request):
+        return {
+            key: values[0]
+            for key, values in request.GET.lists()
+            if key not in (self.page_var, self.error_var, self.cursor_var)
+        }
 
     def filter_queryset(self, queryset):
         self.params = self.get_params(self.request)
-        self.model = self.queryset.__getattribute__("model")
+        self.model = queryset.model
+        self.root_queryset = self.get_search_results(queryset)
 
         (
             self.filter_specs,
@@ -104,11 +374,224 @@ class FilterViewMixin(MultipleObjectMixin, View):
             self.has_active_filters,
         ) = self.get_filters(self.request)
 
+        return self.prepare_object_list(self.apply_filter_specs(self.root_queryset))
+
+    def get_search_term(self) -> str:
+        return self.request.GET.get(self.search_var, "").strip()
+
+    def get_search_backend(self):
+        """Return an instance of ``search_backend`` for ``search_fields``."""
+        backend = self.search_backend
+        if isinstance(backend, str):
+            backend = import_string(backend)
+        return backend(self.search_fields)
+
+    def get_search_results(self, queryset):
+        """Return <queryset> limited to the rows matching the search term.
+
+        The term is read from the ``search_var`` parameter and matched against
+        ``search_fields`` by ``search_backend`` (``FILTERVIEW_SEARCH_BACKEND``),
+        see :mod:`django_listview_filters.search`. Search is applied before the
+        filters, so facet counts and narrowed choices reflect it.
+        """
+        term = self.get_search_term()
+        if not term or not self.search_fields:
+            return queryset
+        return self.get_search_backend().search(queryset, term)
+
+    def apply_filter_specs(self, queryset):
+        """Return <queryset> filtered by every filter spec.
+
+        Specs with ``narrow_choices`` are then narrowed to the other filters.
+        """
         for filter_spec in self.filter_specs:
-            new_qs = filter_spec.queryset(self.request, queryset)
+            with self.profile_filter("queryset", filter_spec):
+                new_qs = filter_spec.queryset(self.request, queryset)
             if new_qs is not None:
                 queryset = new_qs
 
+        for filter_spec in self.filter_specs:
+            if getattr(filter_spec, "narrow_choices", False):
+                filter_spec.narrow(self)
+
+        return queryset
+
+    def prepare_object_list(self, queryset):
+        """Return <queryset> loading what ``list_display`` shows.
+
+        Applied to the filtered queryset only; facets and choices are counted
+        on the unprepared one.
+        """
+        if not self.list_display:
+            return queryset
+        plan = self.get_display_plan(queryset.model)
+        if plan["select_related"]:
+            queryset = queryset.select_related(*plan["select_related"])
+        if plan["prefetch_related"]:
+            queryset = queryset.prefetch_related(*plan["prefetch_related"])
+        if self.list_display_only and plan["only"] is not None:
+            queryset = queryset.only(*plan["only"])
+        return queryset
+
+    def get_display_plan(self, model) -> dict:
+        """Return how to load ``list_display`` for <model>, once per view class.
+
+        Each field path is resolved with ``get_fields_from_path``. Relations
+        followed through single-valued relations are joined with
+        ``select_related``; from the first multi-valued relation on, they're
+        loaded with ``prefetch_related``. ``only`` holds the paths read from
+        the joined rows, or None if an entry isn't a field path (e.g. a
+        method or a callable), as it could read any field.
+
+        Entries ending in a relation (e.g. "author", shown with its
+        ``__str__()``) load every field of the related object. As in
+        ``get_filter_plan()``, a ``list_display`` set on the instance isn't
+        cached.
+
+        :param model: Model of the view's queryset
+        :type model: Model
+        :return: ``select_related``, ``prefetch_related`` and ``only`` lists
+        :rtype: dict
+        """
+        cls = type(self)
+        if self.list_display is not cls.list_display:
+            # Set on the instance (e.g. by as_view()), so not cached.
+            return self.resolve_display_plan(model, self.list_display)
+        key = (cls, model)
+        if key not in cls._display_plans:
+            cls._display_plans[key] = self.resolve_display_plan(
+                model,
+                cls.list_display,
+            )
+        return cls._display_plans[key]
+
+    def resolve_display_plan(self, model, list_display) -> dict:
+        """Return the plan of ``get_display_plan()`` for <list_display>."""
+        select_related = {}
+        prefetch_related = {}
+        only = {}
+        for field_path in list_display:
+            if not isinstance(field_path, str):
+                only = None
+                continue
+            try:
+                fields = get_fields_from_path(model, field_path)
+            except (FieldDoesNotExist, NotRelationField):
+                only = None
+                continue
+            parts = field_path.split(LOOKUP_SEP)
+            relations = [
+                index for index, field in enumerate(fields) if field.is_relation
+            ]
+            multi_valued = [
+                index
+                for index in relations
+                if fields[index].many_to_many or fields[index].one_to_many
+            ]
+            if relations:
+                relation_path = LOOKUP_SEP.join(parts[: relations[-1] + 1])
+            if multi_valued:
+                # Rows of the list can only be joined up to the relation.
+                path = LOOKUP_SEP.join(parts[: multi_valued[0]])
+                if path:
+                    select_related[path] = None
+                prefetch_related[relation_path] = None
+            else:
+                if relations:
+                    select_related[relation_path] = None
+                path = field_path
+            if only is not None and path:
+                only[path] = None
+        return {
+            "select_related": list(select_related),
+            "prefetch_related": list(prefetch_related),
+            "only": None if only is None else list(only),
+        }
+
+    def profile_filter(self, stage: str, filter_spec: ListViewFilter = None):
+        """Return a context manager recording the time and queries of <stage>.
+
+        Does nothing unless ``instrument_filters`` (or
+        ``FILTERVIEW_INSTRUMENT_FILTERS``) is True. Otherwise a record is added
+        to ``self.filter_profile``, logged to the ``django_listview_filters``
+        logger at DEBUG level and sent with the ``filter_spec_profiled``
+        signal. Stages are "construction", "queryset", "prefetch" (all specs at
+        once) and "choices".
+
+        :param stage: Name of the stage being profiled
+        :type stage: str
+        :param filter_spec: Filter spec the stage belongs to, if known yet
+        :type filter_spec: ListViewFilter
+        """
+        if not self.instrument_filters:
+            return nullcontext({})
+        return self._profile_filter(stage, filter_spec)
+
+    @contextmanager
+    def _profile_filter(self, stage, filter_spec):
+        using = router.db_for_read(self.model)
+        with profile_stage(self.filter_profile, stage, using, filter_spec) as record:
+            yield record
+        filter_spec_profiled.send(sender=self.__class__, view=self, record=record)
+
+    def prefetch_facets(self):
+        """Run the facet queries of every filter spec together.
+
+        Each spec lists the grouped querysets it needs through
+        ``get_facet_querysets()``; they are combined with ``UNION ALL`` (one
+        query per class of value column, e.g. text or integer) and the results
+        handed back to each spec so building ``choices()`` doesn't query per
+        filter. Pending related choices are read first, one query per related
+        model.
+        """
+        with self.profile_filter("prefetch"):
+            self._prefetch_facets()
+
+    def _prefetch_facets(self):
+        self.load_filter_choices(self.filter_specs)
+        self.set_facet_results(run_facet_querysets(self.get_prefetch_facets()))
+
+    def load_filter_choices(self, filter_specs):
+        """Read the choices of the related filters in <filter_specs> together.
+
+        Related filters on the same model share one query (see
+        ``RelatedFieldListViewFilter.load_choices_together()``), so the number
+        of choice queries doesn't grow with the number of filters.
+        """
+        RelatedFieldListViewFilter.load_choices_together(filter_specs)
+
+    def get_prefetch_facets(self) -> dict:
+        """Return the facets of every spec not loaded yet, by (index, name)."""
+        facets = {}
+        for index, filter_spec in enumerate(self.filter_specs):
+            get_facet_querysets = getattr(filter_spec, "get_facet_querysets", None)
+            if get_facet_querysets is None:
+                continue
+            for name, queryset in get_facet_querysets(self).items():
+                if name not in filter_spec.facet_results:
+                    facets[(index, name)] = queryset
+        return facets
+
+    def set_facet_results(self, results: dict):
+        for (index, name), result in results.items():
+            self.filter_specs[index].set_facet_result(name, result)
+
+    def get_facet_queryset(self, exclude: ListViewFilter = None):
+        """Return the root queryset with every filter except <exclude> applied.
+
+        Used by filters to compute facet counts that reflect the other active
+        filters, in the same way the Django admin does.
+
+        :param exclude: Filter whose own lookup should not be applied
+        :type exclude: ListViewFilter
+        """
+        queryset = self.root_queryset
+        for filter_spec in self.filter_specs:
+            if filter_spec is exclude:
+                continue
+            new_qs = filter_spec.queryset(self.request, queryset)
+            if new_qs is not None:
+                queryset = new_qs
         return queryset
 
     def get_queryset(self):
@@ -131,49 +614,29 @@ class FilterViewMixin(MultipleObjectMixin, View):
 
     def get_filters(self, request):
         lookup_params = self.get_filters_params()
+        # Field filters on multi-valued relations filter through a subquery
+        # (see FieldListViewFilter.queryset()), so rows aren't duplicated.
         may_have_duplicates = False
         has_active_filters = False
 
-        filter_specs = []
-        for list_filter in self.list_filter:
+        created_specs = []
+        for plan_entry in self.get_filter_plan(self.model):
             lookup_params_count = len(lookup_params)
-            if callable(list_filter):
-                spec = list_filter(request, lookup_params, self.model)
-            else:
-                field_path = None
-                if isinstance(list_filter, (tuple, list)):
-                    field, field_list_filter_class = list_filter
-                else:
-                    # This is simply a field name, so use the default
-                    # FieldListFilter class that has been registered for the
-                    # type of the given field.
-                    field, field_list_filter_class = (
-                        list_filter,
-                        FieldListViewFilter.create,
-                    )
-                if not isinstance(field, Field):
-                    field_path = field
-                    field = get_fields_from_path(self.model, field_path)[-1]
-
-                spec = field_list_filter_class(
-                    field,
-                    request,
-                    lookup_params,
-                    self.model,
-                    field_path=field_path,
-                )
-                # field_list_filter_class removes any lookup_params it
-                # processes. If that happened, check if duplicates should be
-                # removed.
-                # if lookup_params_count > len(lookup_params):
-                #     may_have_duplicates |= lookup_spawns_duplicates(
-                #         self.lookup_opts,
-                #         field_path,
-                #     )
-            if spec and spec.has_output():
+            with self.profile_filter("construction") as record:
+                spec = self.create_filter_spec(request, plan_entry, lookup_params)
+                record["filter_spec"] = spec
+            if spec:
+                created_specs.append((spec, lookup_params_count > len(lookup_params)))
+
+        if not self.defer_has_output:
+            with self.profile_filter("construction"):
+                self.load_filter_choices([spec for spec, _active in created_specs])
+
+        filter_specs = []
+        for spec, active in created_specs:
+            if self.defer_has_output or spec.has_output():
                 filter_specs.append(spec)
-                if lookup_params_count > len(lookup_params):
-                    has_active_filters = True
+                has_active_filters |= active
 
         return (
             filter_specs,
@@ -183,26 +646,253 @@ class FilterViewMixin(MultipleObjectMixin, View):
             has_active_filters,
         )
 
-    def get_query_string(self, new_params: dict = None, remove: list = None):
-        if new_params is None:
-            new_params = {}
-        if remove is None:
-            remove = []
-
-        query = furl(self.request.get_full_path())
-
-        for r in remove:
-            list = [k for k in query.args if k.startswith(r)]
-            for k in list:
-                del query.args[k]
-        for k, v in new_params.items():
-            if v is None:
-                if k in query.args:
-                    del query.args[k]
+    def get_filter_plan(self, model) -> list:
+        """Return ``list_filter`` resolved against <model>, once per view class.
+
+        Field paths are resolved with ``get_fields_from_path`` and plain field
+        names get their registered filter class, so each request only has to
+        create the filter specs. Entries are either a callable filter or a
+        ``(field, field_path, filter_class)`` tuple.
+
+        Plans are cached by view class and model. A ``list_filter`` passed to
+        ``as_view()`` or set on the instance is resolved on each request
+        instead, so per-request values don't accumulate in the cache.
+
+        :param model: Model of the view's queryset
+        :type model: Model
+        """
+        cls = type(self)
+        if self.list_filter is not cls.list_filter:
+            # Set on the instance (e.g. by as_view()), so not cached.
+            return self.resolve_filter_plan(model, self.list_filter)
+        key = (cls, model)
+        if key not in cls._filter_plans:
+            cls._filter_plans[key] = self.resolve_filter_plan(model, cls.list_filter)
+        return cls._filter_plans[key]
+
+    def resolve_filter_plan(self, model, list_filters) -> list:
+        """Return the plan of ``get_filter_plan()`` for <list_filters>."""
+        plan = []
+        for list_filter in list_filters:
+            if callable(list_filter):
+                plan.append(list_filter)
+                continue
+
+            field_path = None
+            if isinstance(list_filter, (tuple, list)):
+                field, field_list_filter_class = list_filter
             else:
-                query.args[k] = v
+                # This is simply a field name, so use the default
+                # FieldListFilter class that has been registered for the
+                # type of the given field.
+                field, field_list_filter_class = list_filter, None
+            if not isinstance(field, Field):
+                field_path = field
+                field = get_fields_from_path(model, field_path)[-1]
+            if field_list_filter_class is None:
+                field_list_filter_class = FieldListViewFilter.get_filter_class(
+                    field,
+                )
+            plan.append((field, field_path, field_list_filter_class))
+        return plan
+
+    def create_filter_spec(self, request, plan_entry, lookup_params: dict):
+        """Return the filter spec for one entry of ``get_filter_plan()``."""
+        if callable(plan_entry):
+            return plan_entry(request, lookup_params, self.model)
+
+        field, field_path, field_list_filter_class = plan_entry
+        if field_list_filter_class is None:
+            return None
+        return field_list_filter_class(
+            field,
+            request,
+            lookup_params,
+            self.model,
+            field_path=field_path,
+        )
+
+    def get_base_query_string(self) -> QueryString:
+        """Return the request's query string in canonical form.
+
+        Built once per request from ``get_canonical_params()``, so links to
+        the same filter state are identical whatever URL they're built from.
+        """
+        if getattr(self, "_query_string", None) is None:
+            path = self.filter_url if self.filter_url is not None else self.request.path
+            self._query_string = QueryString(
+                str(path),
+                self.get_canonical_params(),
+                sort_keys=True,
+            )
+        return self._query_string
+
+    def get_canonical_params(self) -> list:
+        """Return the request's parameters as sorted, normalized pairs.
+
+        Filter parameters keep their first value (the one applied, see
+        ``get_params()``) normalized by the spec's ``normalize_parameter()``
+        (dropped if it returns None), the first page is implied and other
+        repeated pairs are dropped.
+        """
+        normalizers = {}
+        for filter_spec in getattr(self, "filter_specs", ()):
+            for name in filter_spec.expected_parameters():
+                normalizers[name] = filter_spec
+
+        pairs = {}
+        for key, values in self.request.GET.lists():
+            if key in normalizers:
+                values = [normalizers[key].normalize_parameter(key, values[0])]
+            elif key == self.page_var:
+                # The paginator reads the last value.
+                values = [] if values[-1] == "1" else values[-1:]
+            for value in values:
+                if value is not None:
+                    pairs.setdefault((key, value), None)
+        return sorted(pairs, key=lambda pair: pair[0])
+
+    def get_query_string(self, new_params: dict = None, remove: list = None) -> str:
+        """Return the current URL with <new_params> set and <remove> removed.
+
+        :param new_params: Parameters to set; a value of None removes the key
+        :type new_params: dict
+        :param remove: Prefixes of parameters to remove
+        :type remove: list
+        """
+        if new_params or remove:
+            # Any change of filters starts again from the first page.
+            new_params = {
+                self.page_var: None,
+                self.cursor_var: None,
+                **(new_params or {}),
+            }
+        return self.get_base_query_string().build(new_params, remove)
 
-        return query
+    def get_cursor_paginator(self, queryset, per_page: int) -> CursorPaginator:
+        return CursorPaginator(queryset, per_page, ordering=self.cursor_ordering)
+
+    def paginate_queryset(self, queryset, page_size):
+        """Paginate by page number, or by cursor if ``cursor_pagination`` is set.
+
+        With ``cursor_pagination`` (or ``FILTERVIEW_CURSOR_PAGINATION``), the
+        page after the ``cursor_var`` parameter is read with a
+        :class:`~django_listview_filters.pagination.CursorPaginator`, so the
+        queryset is neither counted nor offset. The context gets
+        ``next_page_url`` and ``previous_page_url``.
+        """
+        if not self.cursor_pagination:
+            page = getattr(self, "approximate_page", None)
+            if page is None:
+                return super().paginate_queryset(queryset, page_size)
+            return (page.paginator, page, page.object_list, page.has_other_pages())
+
+        paginator = self.get_cursor_paginator(queryset, page_size)
+        page = getattr(self, "cursor_page", None)
+        cursor = self.request.GET.get(self.cursor_var)
+        try:
+            if page is None:
+                page = paginator.page(cursor)
+        except InvalidPage as err:
+            raise Http404(
+                _("Invalid page (%(page_number)s): %(message)s")
+                % {"page_number": cursor, "message": err},
+            ) from err
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def get_paginator(self, queryset, *args, **kwargs):
+        paginator = super().get_paginator(queryset, *args, **kwargs)
+        if (
+            self.object_count is None
+            and self.count_strategy != "exact"
+            and hasattr(queryset, "query")
+        ):
+            self.object_count, self.count_is_approximate = self.get_object_count(
+                queryset,
+            )
+        if self.object_count is not None:
+            paginator.count = self.object_count
+        paginator.count_is_approximate = self.count_is_approximate
+        paginator.count_is_capped = self.count_is_capped
+        return paginator
+
+    def get_object_count(self, queryset) -> tuple:
+        """Return ``(count, approximate)`` for <queryset> per ``count_strategy``.
+
+        - "exact": ``COUNT(*)`` of every row, as Django's Paginator does.
+        - "capped": the rows are counted up to ``count_threshold`` + 1 in a
+          subquery limited with ``LIMIT``. Above the threshold, the count is
+          ``count_threshold`` and approximate.
+        - "estimated": the query planner's estimate (PostgreSQL only), if above
+          ``count_threshold``; otherwise the count is capped as above.
+
+        ``paginator.count_is_approximate`` and the ``count_is_approximate``
+        context variable tell templates to show e.g. "about 2.3M results", and
+        ``count_is_capped`` to show "more than 10,000 results". An approximate
+        count doesn't limit navigation with the default ``paginator_class``
+        (see :class:`~django_listview_filters.pagination.ApproximateCountPaginator`).
+        A request for the "last" page is always counted exactly, as the last
+        page can't be found otherwise.
+
+        :param queryset: Filtered queryset being paginated
+        :type queryset: QuerySet
+        """
+        self.check_count_strategy()
+        if self.count_strategy == "exact" or self.requests_last_page():
+            return queryset.count(), False
+        if self.count_strategy == "estimated":
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate > self.count_threshold:
+                return estimate, True
+        return self.cap_count(count_capped(queryset, self.count_threshold))
+
+    async def aget_object_count(self, queryset) -> tuple:
+        """Async counterpart of ``get_object_count()``."""
+        self.check_count_strategy()
+        if self.count_strategy == "exact" or self.requests_last_page():
+            return await queryset.acount(), False
+        if self.count_strategy == "estimated":
+            estimate = await aestimate_count(queryset)
+            if estimate is not None and estimate > self.count_threshold:
+                return estimate, True
+        return self.cap_count(await acount_capped(queryset, self.count_threshold))
+
+    def requests_last_page(self) -> bool:
+        """Whether the "last" page is requested, which needs an exact count."""
+        page = self.kwargs.get(self.page_kwarg) or self.request.GET.get(
+            self.page_kwarg,
+        )
+        return page == "last"
+
+    @property
+    def count_is_capped(self) -> bool:
+        """Whether counting stopped at ``count_threshold``, with more rows left."""
+        return self.count_is_approximate and self.object_count == self.count_threshold
+
+    def cap_count(self, count: int) -> tuple:
+        if count > self.count_threshold:
+            return self.count_threshold, True
+        return count, False
+
+    def check_count_strategy(self):
+        if self.count_strategy not in ("exact", "capped", "estimated"):
+            raise ImproperlyConfigured(
+                "Unknown count_strategy {!r}; use 'exact', 'capped' or "
+                "'estimated'.".format(self.count_strategy),
+            )
+
+    def get_cursor_urls(self, page) -> dict:
+        """Return the ``next_page_url`` and ``previous_page_url`` of <page>."""
+        urls = {}
+        query_string = self.get_base_query_string()
+        for name, cursor in (
+            ("next_page_url", page.next_cursor),
+            ("previous_page_url", page.previous_cursor),
+        ):
+            urls[name] = (
+                query_string.build({self.cursor_var: cursor}) if cursor else None
+            )
+        return urls
 
     def get_filter_by_name(self, filter_name:str) -> ListViewFilter:
         """Return filter matching `filter_name`
@@ -217,4 +907,185 @@ class FilterViewMixin(MultipleObjectMixin, View):
         else:
             filter = None
 
-        return filter
\ No newline at end of file
+        return filter
+
+
+class AsyncFilterViewMixin(FilterViewMixin):
+    """FilterViewMixin with an ``async def get()`` for ASGI deployments.
+
+    Filter choices, facets and the object count are loaded with the async ORM
+    and the filter specs' queries are awaited concurrently with
+    ``asyncio.gather()``, so the worker isn't blocked while they run. Building
+    the context afterwards doesn't query the database; the page of objects is
+    read when the template is rendered.
+
+    Custom filters that query the database in ``has_output()`` or
+    ``choices()`` must load that data in ``aload_choices()`` or
+    ``aprefetch()``.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = await self.aget_queryset()
+        if self.canonical_redirect:
+            canonical_url = self.get_canonical_url()
+            if canonical_url is not None:
+                return HttpResponseRedirect(canonical_url)
+        if self.conditional_get:
+            values = await self.object_list.order_by().aaggregate(
+                **self.get_validator_aggregates(),
+            )
+            etag, last_modified = self.make_validators(values)
+            # Only the ETag is checked: the latest modification time can't tell
+            # that rows left the filtered set.
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+        if self.defer_has_output:
+            await self.adrop_filter_specs_without_output()
+        if not self.get_allow_empty():
+            if hasattr(self.object_list, "aexists"):
+                is_empty = not await self.object_list.aexists()
+            else:
+                is_empty = not self.object_list
+            if is_empty:
+                raise Http404(
+                    _("Empty list and “%(class_name)s.allow_empty” is False.")
+                    % {"class_name": self.__class__.__name__},
+                )
+        context = await self.aget_context_data()
+        response = self.render_to_response(context)
+        if self.conditional_get:
+            response = self.set_validators(response, etag, last_modified)
+        return response
+
+    async def aget_queryset(self):
+        """Async counterpart of ``get_queryset()``."""
+        queryset = super(FilterViewMixin, self).get_queryset()
+        return await self.afilter_queryset(queryset)
+
+    async def afilter_queryset(self, queryset):
+        self.params = self.get_params(self.request)
+        self.model = queryset.model
+        self.root_queryset = self.get_search_results(queryset)
+
+        (
+            self.filter_specs,
+            self.has_filters,
+            remaining_lookup_params,
+            filters_may_have_duplicates,
+            self.has_active_filters,
+        ) = await self.aget_filters(self.request)
+
+        return self.prepare_object_list(self.apply_filter_specs(self.root_queryset))
+
+    async def aget_filters(self, request):
+        """Async counterpart of ``get_filters()``.
+
+        Every spec is created first, then their ``aload_choices()`` are
+        awaited together before ``has_output()`` is checked.
+        """
+        lookup_params = self.get_filters_params()
+
+        created_specs = []
+        for plan_entry in self.get_filter_plan(self.model):
+            lookup_params_count = len(lookup_params)
+            with self.profile_filter("construction") as record:
+                spec = self.create_filter_spec(request, plan_entry, lookup_params)
+                record["filter_spec"] = spec
+            if spec:
+                created_specs.append((spec, lookup_params_count > len(lookup_params)))
+
+        if not self.defer_has_output:
+            await RelatedFieldListViewFilter.aload_choices_together(
+                [spec for spec, _active in created_specs],
+            )
+            await asyncio.gather(
+                *(spec.aload_choices(request) for spec, _active in created_specs),
+            )
+
+        filter_specs = []
+        has_active_filters = False
+        for spec, active in created_specs:
+            if self.defer_has_output or spec.has_output():
+                filter_specs.append(spec)
+                has_active_filters |= active
+
+        return (
+            filter_specs,
+            bool(filter_specs),
+            lookup_params,
+            False,
+            has_active_filters,
+        )
+
+    async def adrop_filter_specs_without_output(self):
+        await RelatedFieldListViewFilter.aload_choices_together(self.filter_specs)
+        await asyncio.gather(
+            *(spec.aload_choices(self.request) for spec in self.filter_specs),
+        )
+        self.drop_filter_specs_without_output()
+
+    async def aprefetch_filters(self):
+        """Load everything the filter specs' ``choices()`` need.
+
+        The specs' ``aprefetch()`` and the object count are awaited together,
+        then the facets of every spec are run as in ``prefetch_facets()``, with
+        the query of each column type awaited concurrently.
+        """
+        with self.profile_filter("prefetch"):
+            await RelatedFieldListViewFilter.aload_choices_together(self.filter_specs)
+            awaitables = [spec.aprefetch(self) for spec in self.filter_specs]
+            page_size = self.get_paginate_by(self.object_list)
+            if page_size is not None and self.cursor_pagination:
+                awaitables.append(self.aget_cursor_page(page_size))
+            elif page_size is not None and hasattr(self.object_list, "acount"):
+                awaitables.append(self.acount_objects(page_size))
+            await asyncio.gather(*awaitables)
+            facets = self.get_prefetch_facets()
+            self.set_facet_results(await arun_facet_querysets(facets))
+
+    async def aget_cursor_page(self, page_size: int):
+        paginator = self.get_cursor_paginator(self.object_list, page_size)
+        try:
+            self.cursor_page = await paginator.apage(
+                self.request.GET.get(self.cursor_var),
+            )
+        except InvalidPage:
+            # Reported by paginate_queryset().
+            pass
+
+    async def acount_objects(self, page_size: int):
+        # Counted ahead so get_paginator() doesn't query.
+        (
+            self.object_count,
+            self.count_is_approximate,
+        ) = await self.aget_object_count(self.object_list)
+        if not self.count_is_approximate:
+            return
+        # The page of an approximate count is read on creation, so ahead too.
+        paginator = self.get_paginator(
+            self.object_list,
+            page_size,
+            orphans=self.get_paginate_orphans(),
+            allow_empty_first_page=self.get_allow_empty(),
+        )
+        if not hasattr(paginator, "apage"):
+            return
+        # "last" is counted exactly, so isn't requested here.
+        number = (
+            self.kwargs.get(self.page_kwarg)
+            or self.request.GET.get(self.page_kwarg)
+            or 1
+        )
+        try:
+            self.approximate_page = await paginator.apage(number)
+        except InvalidPage as err:
+            raise Http404(
+                _("Invalid page (%(page_number)s): %(message)s")
+                % {"page_number": number, "message": err},
+            ) from err
+
+    async def aget_context_data(self, **kwargs):
+        """Prefetch the filters with the async ORM, then build the context."""
+        await self.aprefetch_filters()
+        return self.get_context_data(**kwargs)
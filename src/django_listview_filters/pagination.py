@@ -0,0 +1,304 @@
+import json
+
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import EmptyPage, InvalidPage, Page, Paginator
+from django.db import connections, models
+
+
+def count_capped(queryset, cap: int) -> int:
+    """Return the number of rows of <queryset>, counting at most <cap> + 1.
+
+    The rows are counted in a subquery limited with ``LIMIT``, so the database
+    stops reading after <cap> + 1 of them. A result of <cap> or less is exact.
+
+    :param queryset: Queryset to count
+    :type queryset: QuerySet
+    :param cap: Largest count needed
+    :type cap: int
+    """
+    return queryset.order_by()[: cap + 1].count()
+
+
+async def acount_capped(queryset, cap: int) -> int:
+    """Async counterpart of ``count_capped()``."""
+    return await queryset.order_by()[: cap + 1].acount()
+
+
+def _get_plan_rows(explain: str):
+    try:
+        return int(json.loads(explain)[0]["Plan"]["Plan Rows"])
+    except (ValueError, LookupError, TypeError):
+        return None
+
+
+def estimate_count(queryset):
+    """Return the query planner's estimate of the rows of <queryset>.
+
+    Only PostgreSQL is supported, with ``EXPLAIN (FORMAT JSON)``; None is
+    returned on other databases. The estimate comes from table statistics, so
+    it can be far off for selective filters or tables not recently analyzed.
+
+    :param queryset: Queryset to estimate
+    :type queryset: QuerySet
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    return _get_plan_rows(queryset.order_by().explain(format="json"))
+
+
+async def aestimate_count(queryset):
+    """Async counterpart of ``estimate_count()``."""
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    return _get_plan_rows(await queryset.order_by().aexplain(format="json"))
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator whose ``count`` may be approximate.
+
+    Until ``count_is_approximate`` is set (by FilterViewMixin), it works as
+    Django's Paginator. After, the count is only shown, not trusted for
+    navigation: any page number is accepted, each page is read with
+    ``per_page + 1`` rows to tell whether another one follows, and a page is
+    empty only if it has no rows. ``num_pages`` is at least the last page known
+    to exist. ``count_is_capped`` means there are more than ``count`` rows.
+    """
+
+    count_is_approximate = False
+    count_is_capped = False
+    known_pages = 0
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not self.count_is_approximate or int(number) < 1:
+                raise
+            return int(number)
+
+    @property
+    def num_pages(self):
+        return max(super().num_pages, self.known_pages)
+
+    def get_page_rows(self, number: int):
+        """Return the rows of page <number>, and the first of the next page."""
+        bottom = (number - 1) * self.per_page
+        return self.object_list[bottom : bottom + self.per_page + 1]
+
+    def make_page(self, rows: list, number: int):
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        has_next = len(rows) > self.per_page
+        self.known_pages = max(self.known_pages, number + has_next)
+        return ApproximateCountPage(rows[: self.per_page], number, self, has_next)
+
+    def page(self, number):
+        if not self.count_is_approximate:
+            return super().page(number)
+        number = self.validate_number(number)
+        return self.make_page(list(self.get_page_rows(number)), number)
+
+    async def apage(self, number):
+        """Async counterpart of ``page()``."""
+        if not self.count_is_approximate:
+            return super().page(number)
+        number = self.validate_number(number)
+        return self.make_page([row async for row in self.get_page_rows(number)], number)
+
+
+class ApproximateCountPage(Page):
+    """A page of an ApproximateCountPaginator whose count is approximate."""
+
+    def __init__(self, object_list, number, paginator, has_next: bool):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def end_index(self) -> int:
+        return self.start_index() + len(self.object_list) - 1
+
+
+class CursorPaginator:
+    """Paginate a queryset by seeking past the rows already shown.
+
+    Instead of ``OFFSET``, each page is fetched with a predicate on the
+    ordering values of the last (or first, going back) row of the previous
+    page and ``LIMIT per_page + 1``, so a deep page costs the same as the first
+    one and nothing is counted. Cursors are signed, so clients can't forge
+    them.
+
+    The ordering (``ordering``, else the queryset's, else the model's) must be
+    on non-null fields; the primary key is added to make it unique.
+
+    :param queryset: Queryset to paginate
+    :type queryset: QuerySet
+    :param per_page: Number of rows per page
+    :type per_page: int
+    :param ordering: Field names, optionally prefixed with "-"
+    :type ordering: list
+    """
+
+    salt = "django_listview_filters.cursor"
+
+    def __init__(self, queryset, per_page: int, ordering=None):
+        self.per_page = int(per_page)
+        self.ordering = self.get_ordering(queryset, ordering)
+        self.queryset = queryset
+
+    def get_ordering(self, queryset, ordering=None) -> list:
+        """Return the ordering as a list of ``(field_path, descending)``."""
+        ordering = list(
+            ordering or queryset.query.order_by or queryset.model._meta.ordering,
+        )
+        items = []
+        for field_name in ordering:
+            if not isinstance(field_name, str):
+                raise ImproperlyConfigured(
+                    "{} only supports field names in the ordering, not {!r}.".format(
+                        self.__class__.__name__,
+                        field_name,
+                    ),
+                )
+            items.append((field_name.lstrip("-"), field_name.startswith("-")))
+        pk_names = {"pk", queryset.model._meta.pk.name}
+        if not any(field_path in pk_names for field_path, _desc in items):
+            items.append(("pk", False))
+        return items
+
+    def encode_cursor(self, values: list, reverse: bool) -> str:
+        values = [
+            value
+            if value is None or isinstance(value, (bool, int, float, str))
+            else str(value)
+            for value in values
+        ]
+        return signing.dumps([reverse, values], salt=self.salt, compress=True)
+
+    def decode_cursor(self, cursor: str):
+        """Return ``(reverse, values)`` from <cursor>, or raise InvalidPage."""
+        try:
+            reverse, values = signing.loads(cursor, salt=self.salt)
+        except (signing.BadSignature, ValueError, TypeError) as err:
+            raise InvalidPage("Invalid cursor.") from err
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidPage("Invalid cursor.")
+        return bool(reverse), values
+
+    def get_seek_q(self, ordering: list, values: list) -> models.Q:
+        """Return the predicate selecting the rows after <values> in <ordering>.
+
+        ``(a, b) > (x, y)`` is written as ``a >= x AND (a > x OR (a = x AND
+        b > y))``, so an index on the first ordering field can be used.
+        """
+        query = models.Q()
+        for index, (field_path, descending) in enumerate(ordering):
+            lookup = "lt" if descending else "gt"
+            term = models.Q(**{f"{field_path}__{lookup}": values[index]})
+            for previous_index in range(index):
+                previous_path = ordering[previous_index][0]
+                term &= models.Q(**{previous_path: values[previous_index]})
+            query |= term
+        first_path, first_descending = ordering[0]
+        first_lookup = "lte" if first_descending else "gte"
+        return models.Q(**{f"{first_path}__{first_lookup}": values[0]}) & query
+
+    def get_page_queryset(self, cursor: str = None):
+        """Return the queryset of the page after <cursor>, and the decoded cursor."""
+        reverse, values = self.decode_cursor(cursor) if cursor else (False, None)
+        ordering = [
+            (field_path, descending != reverse)
+            for field_path, descending in self.ordering
+        ]
+        queryset = self.queryset.order_by(
+            *(
+                f"-{field_path}" if descending else field_path
+                for field_path, descending in ordering
+            ),
+        )
+        if values is not None:
+            queryset = queryset.filter(self.get_seek_q(ordering, values))
+        queryset = queryset.annotate(
+            **{
+                f"listview_cursor_{index}": models.F(field_path)
+                for index, (field_path, _descending) in enumerate(self.ordering)
+            },
+        )
+        return queryset[: self.per_page + 1], reverse, values
+
+    def make_page(self, rows: list, reverse: bool, values):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if reverse:
+            rows.reverse()
+            return CursorPage(rows, self, values is not None, has_more)
+        return CursorPage(rows, self, has_more, values is not None)
+
+    def page(self, cursor: str = None):
+        """Return the CursorPage after <cursor>, or the first one.
+
+        :param cursor: A ``next_cursor`` or ``previous_cursor`` of a page
+        :type cursor: str
+        """
+        queryset, reverse, values = self.get_page_queryset(cursor)
+        return self.make_page(list(queryset), reverse, values)
+
+    async def apage(self, cursor: str = None):
+        """Async counterpart of ``page()``."""
+        queryset, reverse, values = self.get_page_queryset(cursor)
+        return self.make_page([row async for row in queryset], reverse, values)
+
+
+class CursorPage:
+    """A page of a CursorPaginator, with cursors to the pages around it."""
+
+    number = None
+
+    def __init__(self, object_list, paginator, has_next: bool, has_previous: bool):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return "<CursorPage of {} objects>".format(len(self))
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    def get_cursor_values(self, row) -> list:
+        names = [f"listview_cursor_{i}" for i in range(len(self.paginator.ordering))]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        values = self.get_cursor_values(self.object_list[-1])
+        return self.paginator.encode_cursor(values, reverse=False)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        values = self.get_cursor_values(self.object_list[0])
+        return self.paginator.encode_cursor(values, reverse=True)
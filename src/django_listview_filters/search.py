@@ -0,0 +1,174 @@
+from django.contrib.admin.utils import lookup_spawns_duplicates
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
+from django.utils.text import smart_split, unescape_string_literal
+
+
+class SearchBackend:
+    """
+    Base class for the backends of ``FilterViewMixin.search_fields``. Must
+    create subclasses to provide ``get_matches()``.
+
+    Matches are combined with the view's filters. If a search field spans a
+    multi-valued relation, they're selected with a ``pk__in`` subquery rather
+    than joined, so rows aren't duplicated and no ``DISTINCT`` is needed.
+    """
+
+    def __init__(self, search_fields):
+        self.search_fields = list(search_fields)
+
+    def get_field_paths(self) -> list:
+        """Return the field paths queried, to check for duplicates."""
+        return [field_name.lstrip("^=@") for field_name in self.search_fields]
+
+    def may_have_duplicates(self, model) -> bool:
+        return any(
+            lookup_spawns_duplicates(model._meta, field_path)
+            for field_path in self.get_field_paths()
+        )
+
+    def get_words(self, term: str) -> list:
+        """Split <term> into words, keeping quoted phrases together."""
+        words = []
+        for bit in smart_split(term):
+            if bit[:1] in ('"', "'") and bit[-1:] == bit[:1]:
+                bit = unescape_string_literal(bit)
+            if bit:
+                words.append(bit)
+        return words
+
+    def get_matches(self, queryset, term: str):
+        """Return <queryset> filtered to the rows matching <term>."""
+        raise NotImplementedError(
+            "Subclasses of SearchBackend must provide a 'get_matches()' method.",
+        )
+
+    def search(self, queryset, term: str):
+        """Return <queryset> limited to the rows matching <term>.
+
+        :param queryset: Queryset to search
+        :type queryset: QuerySet
+        :param term: Search term from the request
+        :type term: str
+        """
+        if not term or not self.search_fields:
+            return queryset
+        if self.may_have_duplicates(queryset.model):
+            matches = self.get_matches(queryset.model._default_manager.all(), term)
+            return queryset.filter(pk__in=matches.values("pk"))
+        return self.get_matches(queryset, term)
+
+
+class IContainsSearchBackend(SearchBackend):
+    """
+    Every word of the term must be found in one of the fields, with
+    ``icontains``. As in ``ModelAdmin.search_fields``, prefix a field with
+    ``^`` for ``istartswith`` or ``=`` for ``iexact``. The full-text ``@``
+    prefix is ignored, so those fields use ``icontains``.
+
+    Works on any database, but ``icontains`` can't use a B-tree index, so large
+    tables are scanned (a PostgreSQL ``gin_trgm_ops`` index can serve it).
+    """
+
+    lookups = {"^": "istartswith", "=": "iexact"}
+
+    def get_lookup(self, field_name: str) -> str:
+        lookup = self.lookups.get(field_name[:1])
+        if lookup is None:
+            return "{}__icontains".format(field_name.lstrip("@"))
+        return f"{field_name[1:]}__{lookup}"
+
+    def get_matches(self, queryset, term: str):
+        lookups = [self.get_lookup(field_name) for field_name in self.search_fields]
+        for word in self.get_words(term):
+            query = models.Q()
+            for lookup in lookups:
+                query |= models.Q(**{lookup: word})
+            queryset = queryset.filter(query)
+        return queryset
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    PostgreSQL full-text search with ``SearchVector`` and ``SearchQuery``.
+
+    Set ``vector_field`` to a stored ``SearchVectorField`` with a GIN index so
+    matching uses the index; otherwise a vector of ``search_fields`` is built
+    for each row, which only an identical expression index can serve.
+    """
+
+    config = None
+    search_type = "websearch"
+    vector_field = None
+
+    def get_field_paths(self) -> list:
+        if self.vector_field is not None:
+            return [self.vector_field]
+        return super().get_field_paths()
+
+    def get_matches(self, queryset, term: str):
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+
+        query = SearchQuery(term, config=self.config, search_type=self.search_type)
+        if self.vector_field is not None:
+            return queryset.filter(**{self.vector_field: query})
+        vector = SearchVector(*self.get_field_paths(), config=self.config)
+        return queryset.annotate(listview_search=vector).filter(
+            listview_search=query,
+        )
+
+
+class PostgresTrigramSearchBackend(IContainsSearchBackend):
+    """
+    PostgreSQL fuzzy search with the ``pg_trgm`` extension.
+
+    Every word of the term must be similar to a word of one of the fields
+    (``trigram_word_similar``), which a GIN ``gin_trgm_ops`` index on each
+    field can serve. Requires ``django.contrib.postgres`` in
+    ``INSTALLED_APPS``.
+    """
+
+    def get_lookup(self, field_name: str) -> str:
+        return f"{field_name.lstrip('^=@')}__trigram_word_similar"
+
+
+class SQLiteFTS5SearchBackend(SearchBackend):
+    """
+    SQLite full-text search against an FTS5 table whose ``rowid`` is the
+    model's primary key, such as an external content table:
+
+    .. code-block:: sql
+
+        CREATE VIRTUAL TABLE shop_book_fts
+            USING fts5(title, summary, content='shop_book', content_rowid='id');
+
+    Keeping ``fts_table`` in sync (with triggers, or its ``rebuild`` command) is
+    up to the project. ``search_fields`` are the FTS5 columns searched; every
+    word of the term is matched as a prefix.
+    """
+
+    fts_table = None
+
+    def may_have_duplicates(self, model) -> bool:
+        return False
+
+    def get_match_expression(self, term: str) -> str:
+        words = " ".join(
+            '"{}"*'.format(word.replace('"', '""')) for word in self.get_words(term)
+        )
+        columns = " ".join(self.search_fields)
+        return f"{{{columns}}} : ({words})"
+
+    def get_matches(self, queryset, term: str):
+        if self.fts_table is None:
+            raise ImproperlyConfigured(
+                "{} requires an 'fts_table'.".format(self.__class__.__name__),
+            )
+        if not self.get_words(term):
+            return queryset
+        table = connections[queryset.db].ops.quote_name(self.fts_table)
+        sql = f"SELECT rowid FROM {table} WHERE {table} MATCH %s"
+        return queryset.filter(
+            pk__in=RawSQL(sql, [self.get_match_expression(term)]),
+        )
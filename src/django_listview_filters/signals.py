@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent by FilterViewMixin for each profiled stage of a filter spec when
+# filter instrumentation is enabled. Arguments: ``view`` and ``record``, a dict
+# with ``filter``, ``filter_spec``, ``stage``, ``time`` and ``queries``.
+filter_spec_profiled = Signal()
@@ -0,0 +1,427 @@
+import csv
+import json
+
+from django.contrib.admin.utils import (
+    NotRelationField,
+    get_fields_from_path,
+    lookup_spawns_duplicates,
+)
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.urls import path
+from django.utils.cache import get_conditional_response, set_response_etag
+from django.views.generic import View
+
+from .filters import RelatedFieldAutocompleteListViewFilter
+
+
+class ListViewAccessMixin:
+    """Apply the access checks of ``list_view`` to a view serving its data.
+
+    Before a request is handled, ``list_view``'s ``dispatch()`` is run with
+    its handler stubbed out, so ``LoginRequiredMixin``,
+    ``PermissionRequiredMixin``, decorators on ``dispatch()`` and any other
+    check made there refuse (or redirect) the request as they would on the
+    list itself.
+    """
+
+    list_view = None
+
+    def get_list_view(self):
+        if self.list_view is None:
+            raise ImproperlyConfigured(
+                "{} requires a 'list_view'.".format(self.__class__.__name__),
+            )
+        return self.list_view
+
+    def get_list_model(self):
+        """Return the model listed by ``list_view``.
+
+        Read from its ``model`` or ``queryset``, else from ``get_queryset()``
+        of an instance set up for the current request.
+        """
+        list_view = self.get_list_view()
+        if list_view.model is not None:
+            return list_view.model
+        if list_view.queryset is not None:
+            return list_view.queryset.model
+        view = list_view(defer_filter_output=True)
+        view.setup(self.request, *self.args, **self.kwargs)
+        return view.get_queryset().model
+
+    def dispatch(self, request, *args, **kwargs):
+        response = self.check_list_view_access(request, *args, **kwargs)
+        if response is not None:
+            return response
+        return super().dispatch(request, *args, **kwargs)
+
+    def check_list_view_access(self, request, *args, **kwargs):
+        """Return the response ``list_view`` refuses <request> with, or None."""
+        view = self.get_list_view()()
+        view.setup(request, *args, **kwargs)
+        allowed = object()
+
+        def handler(request, *args, **kwargs):
+            return allowed
+
+        setattr(view, request.method.lower(), handler)
+        response = view.dispatch(request, *args, **kwargs)
+        return None if response is allowed else response
+
+
+class FilterAutocompleteView(ListViewAccessMixin, View):
+    """Return related objects matching a search term as JSON.
+
+    Serves the :class:`~django_listview_filters.filters.RelatedFieldAutocompleteListViewFilter`
+    filters of ``list_view``. Only fields declared in its ``list_filter`` with
+    that filter class can be searched.
+
+    Query parameters are ``field`` (the field path in ``list_filter``),
+    ``term``, ``page`` and ``limit``. The response follows the Select2 format::
+
+        {"results": [{"id": 1, "text": "Ann"}], "pagination": {"more": false}}
+
+    Pages are fetched with ``LIMIT``/``OFFSET`` and one extra row, so the
+    related table is never counted. Requests ``list_view`` refuses are refused
+    too (see :class:`ListViewAccessMixin`).
+    """
+
+    paginate_by = 20
+    max_paginate_by = 100
+    field_param = "field"
+    term_param = "term"
+    page_param = "page"
+    limit_param = "limit"
+
+    def get_filter(self, request):
+        """Return the autocomplete filter named by the ``field`` parameter."""
+        list_view = self.get_list_view()
+        field_path = request.GET.get(self.field_param)
+        for list_filter in list_view.list_filter:
+            if not isinstance(list_filter, (tuple, list)):
+                continue
+            field, filter_class = list_filter
+            if field == field_path and issubclass(
+                filter_class,
+                RelatedFieldAutocompleteListViewFilter,
+            ):
+                break
+        else:
+            raise Http404(f"No autocomplete filter for '{field_path}'.")
+
+        model = self.get_list_model()
+        field = get_fields_from_path(model, field_path)[-1]
+        return filter_class(field, request, {}, model, field_path=field_path)
+
+    def get_paginate_by(self, request) -> int:
+        try:
+            limit = int(request.GET.get(self.limit_param, self.paginate_by))
+        except ValueError:
+            limit = self.paginate_by
+        return max(1, min(limit, self.max_paginate_by))
+
+    def get(self, request, *args, **kwargs):
+        spec = self.get_filter(request)
+        term = request.GET.get(self.term_param, "").strip()
+        limit = self.get_paginate_by(request)
+        try:
+            page = max(1, int(request.GET.get(self.page_param, 1)))
+        except ValueError:
+            page = 1
+
+        offset = (page - 1) * limit
+        queryset = spec.get_autocomplete_queryset(request, term)
+        choices = spec.label_choices(queryset[offset : offset + limit + 1])
+
+        return JsonResponse(
+            {
+                "results": [
+                    {"id": pk, "text": label} for pk, label in choices[:limit]
+                ],
+                "pagination": {"more": len(choices) > limit},
+            },
+        )
+
+
+class FilterFacetsView(ListViewAccessMixin, View):
+    """Return the filters of ``list_view`` and their choices as JSON.
+
+    The query string is applied as it would be on ``list_view``, and the body
+    is its :meth:`~django_listview_filters.mixins.FilterViewMixin.get_facet_payload`.
+    Choice URLs point to ``list_url`` (may be ``reverse_lazy()``) if set.
+
+    If ``list_view`` has ``conditional_get``, its validators are checked before
+    any choice is loaded, so a 304 costs one aggregate query. Otherwise
+    responses have an ``ETag`` from their content, and ``If-None-Match`` is
+    honoured once the payload is built. With ``stream`` set, each filter is
+    encoded and sent as soon as its choices are built, which keeps memory flat
+    for large facet sets; streamed responses have no ``ETag``. Requests
+    ``list_view`` refuses are refused too (see :class:`ListViewAccessMixin`).
+    """
+
+    list_url = None
+    stream = False
+    encoder = DjangoJSONEncoder
+
+    def setup_list_view(self, request, *args, **kwargs):
+        """Return ``list_view`` set up for <request>, with its queryset filtered.
+
+        Filter choices aren't loaded until the view's
+        ``drop_filter_specs_without_output()`` is called.
+        """
+        view = self.get_list_view()(
+            filter_url=self.list_url,
+            defer_filter_output=True,
+        )
+        view.setup(request, *args, **kwargs)
+        view.object_list = view.get_queryset()
+        return view
+
+    def get(self, request, *args, **kwargs):
+        view = self.setup_list_view(request, *args, **kwargs)
+        etag = None
+        if view.conditional_get:
+            etag, last_modified = view.get_validators(view.object_list)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+        view.drop_filter_specs_without_output()
+        if self.stream:
+            return StreamingHttpResponse(
+                self.stream_payload(view),
+                content_type="application/json",
+            )
+
+        response = JsonResponse(view.get_facet_payload(), encoder=self.encoder)
+        if etag is not None:
+            return view.set_validators(response, etag, last_modified)
+        set_response_etag(response)
+        return get_conditional_response(
+            request,
+            etag=response.headers["ETag"],
+            response=response,
+        )
+
+    def stream_payload(self, view):
+        """Yield the JSON of ``view.get_facet_payload()`` one filter at a time."""
+        yield '{"filters": ['
+        for index, payload in enumerate(view.iter_filter_payloads()):
+            if index:
+                yield ", "
+            yield json.dumps(payload, cls=self.encoder)
+        yield '], "clear_url": {}}}'.format(
+            json.dumps(view.get_clear_filter_url(), cls=self.encoder),
+        )
+
+
+class FilterExportView(ListViewAccessMixin, View):
+    """Stream the filtered queryset of ``list_view`` as CSV or JSON Lines.
+
+    The query string is applied as it would be on ``list_view`` (filters,
+    search and ordering, without pagination), so an export link is the list's
+    URL with this view's path. Rows are read with
+    ``values_list(*export_fields).iterator(chunk_size)`` and written as they
+    arrive, so no model instances are created and memory stays flat however
+    many rows are exported.
+
+    ``export_fields`` are field paths (e.g. "author__name") with one value per
+    object; a path across a multi-valued relation (e.g. "tags__name") would
+    repeat the object for each related row, so it's refused. They default to
+    the field paths of the list view's ``list_display`` (other entries are
+    skipped), else the model's concrete fields.
+    ``export_format`` is "csv" or "jsonl". Requests ``list_view`` refuses are
+    refused too (see :class:`ListViewAccessMixin`).
+    """
+
+    export_fields = None
+    export_format = "csv"
+    chunk_size = 2000
+    encoder = DjangoJSONEncoder
+    content_types = {
+        "csv": "text/csv",
+        "jsonl": "application/jsonl",
+    }
+
+    def setup_list_view(self, request, *args, **kwargs):
+        """Return ``list_view`` set up for <request>, with its queryset filtered.
+
+        Filter choices aren't loaded, as the export doesn't show them.
+        """
+        view = self.get_list_view()(defer_filter_output=True)
+        view.setup(request, *args, **kwargs)
+        view.object_list = view.get_queryset()
+        return view
+
+    def get_export_fields(self, view) -> list:
+        if self.export_fields:
+            return list(self.export_fields)
+        model = view.object_list.model
+        fields = [
+            entry
+            for entry in view.list_display
+            if self.is_exportable(model, entry)
+        ]
+        return fields or [field.name for field in model._meta.concrete_fields]
+
+    def is_exportable(self, model, field_path) -> bool:
+        """Whether <field_path> is a field path with one value per object."""
+        if not isinstance(field_path, str):
+            return False
+        try:
+            get_fields_from_path(model, field_path)
+        except (FieldDoesNotExist, NotRelationField):
+            return False
+        return not lookup_spawns_duplicates(model._meta, field_path)
+
+    def get_rows(self, view, fields: list):
+        """Return an iterator of the value tuples of the filtered queryset."""
+        queryset = view.object_list.prefetch_related(None)
+        return queryset.values_list(*fields).iterator(chunk_size=self.chunk_size)
+
+    def get_filename(self, view) -> str:
+        return "{}.{}".format(
+            view.object_list.model._meta.model_name,
+            self.export_format,
+        )
+
+    def get(self, request, *args, **kwargs):
+        if self.export_format not in self.content_types:
+            raise ImproperlyConfigured(
+                "Unknown export_format {!r}; use {}.".format(
+                    self.export_format,
+                    " or ".join(repr(name) for name in self.content_types),
+                ),
+            )
+        view = self.setup_list_view(request, *args, **kwargs)
+        fields = self.get_export_fields(view)
+        for field_path in fields:
+            if not self.is_exportable(view.object_list.model, field_path):
+                raise ImproperlyConfigured(
+                    "{} can't export {!r}, which isn't a field path with one "
+                    "value per object.".format(self.__class__.__name__, field_path),
+                )
+        rows = self.get_rows(view, fields)
+        if self.export_format == "csv":
+            content = self.stream_csv(fields, rows)
+        else:
+            content = self.stream_jsonl(fields, rows)
+        response = StreamingHttpResponse(
+            content,
+            content_type=self.content_types[self.export_format],
+        )
+        response.headers["Content-Disposition"] = 'attachment; filename="{}"'.format(
+            self.get_filename(view),
+        )
+        return response
+
+    def stream_csv(self, fields: list, rows):
+        """Yield CSV lines, a header of the field paths then one per row."""
+        buffer = _LineBuffer()
+        writer = csv.writer(buffer)
+        yield writer.writerow(fields)
+        yield from self.join_chunks(writer.writerow(row) for row in rows)
+
+    def stream_jsonl(self, fields: list, rows):
+        """Yield one JSON object per row, keyed by field path."""
+        yield from self.join_chunks(
+            json.dumps(dict(zip(fields, row)), cls=self.encoder) + "\n"
+            for row in rows
+        )
+
+    def join_chunks(self, lines):
+        """Yield <lines> joined by ``chunk_size``, so each write isn't one row."""
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= self.chunk_size:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+
+
+class _LineBuffer:
+    """File-like object returning what csv.writer writes instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def facets_path(route: str, list_view, name: str = None, **initkwargs):
+    """Return a URL pattern serving the filters of <list_view> as JSON.
+
+    *Example:*
+
+    .. code-block:: python
+
+        urlpatterns = [
+            path("books/", BookListView.as_view(), name="books"),
+            facets_path(
+                "books/facets/",
+                BookListView,
+                name="book-facets",
+                list_url=reverse_lazy("books"),
+            ),
+        ]
+
+    :param route: Route passed to :func:`django.urls.path`
+    :type route: str
+    :param list_view: View using FilterViewMixin
+    :type list_view: FilterViewMixin
+    :param name: URL name
+    :type name: str
+    """
+    view = FilterFacetsView.as_view(list_view=list_view, **initkwargs)
+    return path(route, view, name=name)
+
+
+def export_path(route: str, list_view, name: str = None, **initkwargs):
+    """Return a URL pattern streaming the filtered queryset of <list_view>.
+
+    *Example:*
+
+    .. code-block:: python
+
+        urlpatterns = [
+            path("books/", BookListView.as_view(), name="books"),
+            export_path("books/export.csv", BookListView, name="book-export"),
+            export_path(
+                "books/export.jsonl",
+                BookListView,
+                export_format="jsonl",
+                export_fields=["title", "author__name", "published"],
+            ),
+        ]
+
+    :param route: Route passed to :func:`django.urls.path`
+    :type route: str
+    :param list_view: View using FilterViewMixin
+    :type list_view: FilterViewMixin
+    :param name: URL name
+    :type name: str
+    """
+    view = FilterExportView.as_view(list_view=list_view, **initkwargs)
+    return path(route, view, name=name)
+
+
+def autocomplete_path(route: str, list_view, name: str = None, **initkwargs):
+    """Return a URL pattern serving the autocomplete filters of <list_view>.
+
+    *Example:*
+
+    .. code-block:: python
+
+        urlpatterns = [
+            autocomplete_path("books/filters/", BookListView, name="book-filters"),
+        ]
+
+    :param route: Route passed to :func:`django.urls.path`
+    :type route: str
+    :param list_view: View using FilterViewMixin
+    :type list_view: FilterViewMixin
+    :param name: URL name
+    :type name: str
+    """
+    view = FilterAutocompleteView.as_view(list_view=list_view, **initkwargs)
+    return path(route, view, name=name)
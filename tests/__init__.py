@@ -0,0 +1,4 @@
+"""Tests for django_listview_filters.
+
+Run from the repository root with ``python -m pytest tests``.
+"""
@@ -0,0 +1,30 @@
+from django.db import models
+
+
+class Author(models.Model):
+    name = models.CharField(max_length=100)
+
+    def __str__(self):
+        return self.name
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=100)
+
+    def __str__(self):
+        return self.name
+
+
+class Book(models.Model):
+    STATUS_CHOICES = [("d", "Draft"), ("p", "Published"), ("r", "Retired")]
+
+    title = models.CharField(max_length=200)
+    author = models.ForeignKey(Author, on_delete=models.CASCADE)
+    tags = models.ManyToManyField(Tag, blank=True)
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES, default="d")
+    pages = models.IntegerField(null=True)
+    published = models.DateField(null=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.title
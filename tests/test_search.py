@@ -0,0 +1,88 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from django_listview_filters.search import IContainsSearchBackend
+
+from . import views
+from .models import Author, Book
+from .test_views import get_response
+
+
+class IContainsSearchBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ann = Author.objects.create(name="Ann")
+        Book.objects.create(title="Dune", author=ann)
+        Book.objects.create(title="Emma", author=ann)
+
+    def test_lookups(self):
+        backend = IContainsSearchBackend(["title", "^title", "=title", "@title"])
+        self.assertEqual(
+            [backend.get_lookup(field_name) for field_name in backend.search_fields],
+            [
+                "title__icontains",
+                "title__istartswith",
+                "title__iexact",
+                "title__icontains",
+            ],
+        )
+
+    def test_full_text_prefix_uses_icontains(self):
+        backend = IContainsSearchBackend(["@title"])
+        matches = backend.search(Book.objects.all(), "UN")
+        self.assertQuerySetEqual(matches, ["Dune"], transform=str)
+
+
+class SQLiteFTS5SearchBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ann = Author.objects.create(name="Ann")
+        cls.bob = Author.objects.create(name="Bob")
+        Book.objects.create(title="Dune", author=cls.ann)
+        Book.objects.create(title="Dune Messiah", author=cls.ann)
+        Book.objects.create(title="The Dune Encyclopedia", author=cls.bob)
+        Book.objects.create(title="Emma", author=cls.bob)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE tests_book_fts USING fts5("
+                "title, content='tests_book', content_rowid='id')",
+            )
+            cursor.execute(
+                "INSERT INTO tests_book_fts(tests_book_fts) VALUES ('rebuild')",
+            )
+
+    def get_titles(self, query: dict) -> list:
+        response = get_response(views.SearchBookListView, query)
+        return [book.title for book in response.context_data["object_list"]]
+
+    def test_match_prefix(self):
+        self.assertEqual(
+            self.get_titles({"search": "dun"}),
+            ["Dune", "Dune Messiah", "The Dune Encyclopedia"],
+        )
+
+    def test_match_every_word(self):
+        self.assertEqual(self.get_titles({"search": "dune mess"}), ["Dune Messiah"])
+        self.assertEqual(self.get_titles({"search": "emma dune"}), [])
+
+    def test_quotes_escaped(self):
+        self.assertEqual(
+            self.get_titles({"search": '"dune"'}),
+            ["Dune", "Dune Messiah", "The Dune Encyclopedia"],
+        )
+        self.assertEqual(self.get_titles({"search": 'du"ne'}), [])
+
+    def test_combined_with_filter(self):
+        self.assertEqual(
+            self.get_titles({"search": "dune", "author__id__exact": self.bob.pk}),
+            ["The Dune Encyclopedia"],
+        )
+
+    @override_settings(FILTERVIEW_SHOW_FACETS=True)
+    def test_facet_counts(self):
+        response = get_response(views.SearchBookListView, {"search": "dune"})
+        _title, choices, _clear_url = response.context_data["filter_list"][0]
+        self.assertEqual(
+            [(choice["display"], choice.get("count")) for choice in choices],
+            [("All", None), ("Ann", 2), ("Bob", 1)],
+        )
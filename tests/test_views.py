@@ -0,0 +1,831 @@
+from datetime import date
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.http import Http404, QueryDict
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from django_listview_filters._cache import get_model_version
+from django_listview_filters.filters import RelatedFieldListViewFilter
+
+from . import views
+from .models import Author, Book, Tag
+
+
+def get_response(view_class, query: dict = None, headers: dict = None, **initkwargs):
+    """Return the unrendered response of <view_class> to a GET with <query>."""
+    request = RequestFactory().get("/", query or {}, headers=headers)
+    request.user = AnonymousUser()
+    view = view_class.as_view(**initkwargs)
+    if view_class.view_is_async:
+        return async_to_sync(view)(request)
+    return view(request)
+
+
+class FilterExportViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ann = Author.objects.create(name="Ann")
+        cls.bob = Author.objects.create(name="Bob")
+        Book.objects.create(title="Dune", author=ann)
+        cls.emma = Book.objects.create(title="Emma", author=cls.bob)
+        cls.emma.tags.add(Tag.objects.create(name="a"), Tag.objects.create(name="b"))
+
+    def get_content(self, response) -> str:
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_filtered(self):
+        response = self.client.get(
+            "/books/export.csv",
+            {"author__id__exact": self.bob.pk},
+        )
+        self.assertEqual(response.status_code, 200)
+        header, *rows = self.get_content(response).splitlines()
+        self.assertEqual(header, "id,title,author,status,pages,published,updated")
+        self.assertEqual(len(rows), 1)
+        self.assertTrue(rows[0].startswith(f"{self.emma.pk},Emma,{self.bob.pk},d,,,"))
+
+    def test_refused_as_list_view(self):
+        response = self.client.get("/private/export.csv")
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(hasattr(response, "streaming_content"))
+
+    def test_allowed_as_list_view(self):
+        self.client.force_login(User.objects.create_user("ann"))
+        response = self.client.get("/private/export.csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.get_content(response).splitlines()), 3)
+
+    def test_default_fields_from_list_display(self):
+        response = self.client.get("/display/export.csv")
+        self.assertEqual(
+            self.get_content(response).splitlines(),
+            ["title,author__name", "Dune,Ann", "Emma,Bob"],
+        )
+
+    def test_choices_not_loaded(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/faceted/export.csv")
+            self.assertEqual(len(self.get_content(response).splitlines()), 3)
+
+    def test_multi_valued_field_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.client.get("/tags/export.csv")
+
+
+class SettingsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Book.objects.create(title="Dune", author=Author.objects.create(name="Ann"))
+        Book.objects.create(title="Emma", author=Author.objects.create(name="Bob"))
+
+    @override_settings(FILTERVIEW_COUNT_STRATEGY="capped", FILTERVIEW_COUNT_THRESHOLD=1)
+    def test_setting_applies_to_library_default(self):
+        response = get_response(views.PagedBookListView)
+        self.assertIs(response.context_data["count_is_approximate"], True)
+
+    @override_settings(FILTERVIEW_COUNT_STRATEGY="capped", FILTERVIEW_COUNT_THRESHOLD=1)
+    def test_view_attribute_overrides_setting(self):
+        response = get_response(views.ExactCountBookListView)
+        self.assertIs(response.context_data["count_is_approximate"], False)
+        self.assertEqual(response.context_data["paginator"].count, 2)
+
+    @override_settings(FILTERVIEW_COUNT_STRATEGY="capped", FILTERVIEW_COUNT_THRESHOLD=1)
+    def test_initkwarg_overrides_setting(self):
+        response = get_response(views.PagedBookListView, count_strategy="exact")
+        self.assertIs(response.context_data["count_is_approximate"], False)
+
+    @override_settings(FILTERVIEW_SHOW_ALL=False)
+    def test_filter_attribute_overrides_setting(self):
+        view = get_response(views.BookListView).context_data["view"]
+        self.assertIs(view.filter_specs[0].show_all, False)
+        view = get_response(views.AllAuthorsBookListView).context_data["view"]
+        self.assertIs(view.filter_specs[0].show_all, True)
+
+
+class PlanCacheTests(TestCase):
+    def test_class_plans_cached(self):
+        view = views.DisplayBookListView()
+        other = views.DisplayBookListView()
+        self.assertIs(view.get_filter_plan(Book), other.get_filter_plan(Book))
+        self.assertIs(view.get_display_plan(Book), other.get_display_plan(Book))
+
+    def test_instance_plans_not_cached(self):
+        filter_plans = len(views.BookListView._filter_plans)
+        display_plans = len(views.BookListView._display_plans)
+        for field_path in ["title", "author__name"]:
+            view = views.BookListView(
+                list_filter=[field_path],
+                list_display=[field_path],
+            )
+            self.assertEqual(view.get_filter_plan(Book)[0][1], field_path)
+            self.assertEqual(view.get_display_plan(Book)["only"], [field_path])
+        self.assertEqual(len(views.BookListView._filter_plans), filter_plans)
+        self.assertEqual(len(views.BookListView._display_plans), display_plans)
+
+
+@override_settings(FILTERVIEW_CACHE="default")
+class ChoicesCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Book.objects.create(title="Dune", author=Author.objects.create(name="Ann"))
+        Book.objects.create(title="Emma", author=Author.objects.create(name="Bob"))
+
+    def setUp(self):
+        cache.clear()
+
+    def get_spec(self, view_class):
+        return get_response(view_class).context_data["view"].filter_specs[0]
+
+    def test_key_depends_on_label_field(self):
+        spec = self.get_spec(views.BookListView)
+        key = spec.get_cache_key()
+        spec.label_field = "name"
+        self.assertNotEqual(spec.get_cache_key(), key)
+
+    def test_key_depends_on_max_choices_and_order(self):
+        spec = self.get_spec(views.TitleBookListView)
+        keys = {spec.get_cache_key()}
+        spec.max_choices = 1
+        keys.add(spec.get_cache_key())
+        spec.choices_order = "frequency"
+        keys.add(spec.get_cache_key())
+        self.assertEqual(len(keys), 3)
+
+    def test_key_depends_on_class_path(self):
+        class AuthorFilterWithAll(RelatedFieldListViewFilter):
+            pass
+
+        spec = self.get_spec(views.AllAuthorsBookListView)
+        key = spec.get_cache_key()
+        spec.__class__ = AuthorFilterWithAll
+        self.assertNotEqual(spec.get_cache_key(), key)
+
+    def test_repeat_request_served_from_cache(self):
+        def author_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = get_response(views.BookListView)
+            _title, choices, _clear_url = response.context_data["filter_list"][0]
+            sqls = [query["sql"] for query in queries.captured_queries]
+            return (
+                [choice["display"] for choice in choices],
+                [sql for sql in sqls if "tests_author" in sql],
+            )
+
+        choices, queries = author_queries()
+        self.assertTrue(queries)
+        self.assertEqual(author_queries(), (choices, []))
+
+    def assertVersionBumped(self, model, change):
+        version = get_model_version(cache, model)
+        change()
+        self.assertNotEqual(get_model_version(cache, model), version)
+
+    def test_save_bumps_version(self):
+        author = Author.objects.get(name="Ann")
+        self.assertVersionBumped(Author, author.save)
+
+    def test_delete_bumps_version(self):
+        book = Book.objects.get(title="Dune")
+        self.assertVersionBumped(Book, book.delete)
+
+    def test_m2m_add_bumps_versions(self):
+        book = Book.objects.get(title="Dune")
+        tag = Tag.objects.create(name="a")
+        get_model_version(cache, Tag)
+        self.assertVersionBumped(Book, lambda: book.tags.add(tag))
+        self.assertVersionBumped(Tag, lambda: book.tags.remove(tag))
+
+
+class FilterAutocompleteViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ann = Author.objects.create(name="Ann")
+        Author.objects.create(name="Bob")
+
+    def test_model_from_get_queryset(self):
+        response = self.client.get("/books/filters/", {"field": "author", "term": "an"})
+        self.assertEqual(
+            response.json(),
+            {
+                "results": [{"id": self.ann.pk, "text": "Ann"}],
+                "pagination": {"more": False},
+            },
+        )
+
+    def test_unknown_field(self):
+        response = self.client.get("/books/filters/", {"field": "title"})
+        self.assertEqual(response.status_code, 404)
+
+
+class FilterFacetsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ann = Author.objects.create(name="Ann")
+        Book.objects.create(title="Dune", author=cls.ann)
+        Book.objects.create(title="Emma", author=Author.objects.create(name="Bob"))
+
+    def get_choices(self, response) -> dict:
+        return {
+            payload["key"]: [choice["label"] for choice in payload["choices"]]
+            for payload in response.json()["filters"]
+        }
+
+    def test_payload(self):
+        response = self.client.get("/faceted/facets/")
+        self.assertEqual(self.get_choices(response), {"author": ["All", "Ann", "Bob"]})
+        self.assertTrue(response.headers["ETag"])
+
+    def test_not_modified_before_choices(self):
+        response = self.client.get("/conditional/facets/")
+        self.assertEqual(self.get_choices(response), {"author": ["All", "Ann", "Bob"]})
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                "/conditional/facets/",
+                HTTP_IF_NONE_MATCH=response.headers["ETag"],
+            )
+        self.assertEqual(response.status_code, 304)
+
+
+class CountStrategyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ann = Author.objects.create(name="Ann")
+        for title in ["Dune", "Emma", "Ulysses"]:
+            Book.objects.create(title=title, author=ann)
+
+    def test_last_page_counted_exactly(self):
+        for view_class in [views.CappedBookListView, views.AsyncCappedBookListView]:
+            with self.subTest(view_class=view_class.__name__):
+                context = get_response(view_class, {"page": "last"}).context_data
+                self.assertEqual(context["page_obj"].number, 3)
+                self.assertEqual(
+                    [book.title for book in context["object_list"]],
+                    ["Ulysses"],
+                )
+                self.assertEqual(context["paginator"].count, 3)
+                self.assertIs(context["count_is_approximate"], False)
+
+    def test_pages_past_capped_count(self):
+        for view_class in [views.CappedBookListView, views.AsyncCappedBookListView]:
+            with self.subTest(view_class=view_class.__name__):
+                with CaptureQueriesContext(connection) as queries:
+                    context = get_response(view_class, {"page": "2"}).context_data
+                    self.assertEqual(
+                        [book.title for book in context["object_list"]],
+                        ["Emma"],
+                    )
+                # Counted up to count_threshold + 1 rows.
+                self.assertTrue(
+                    any(
+                        "COUNT(" in query["sql"] and "LIMIT 2" in query["sql"]
+                        for query in queries.captured_queries
+                    ),
+                )
+                self.assertEqual(context["paginator"].count, 1)
+                self.assertIs(context["count_is_capped"], True)
+                self.assertIs(context["page_obj"].has_next(), True)
+
+                context = get_response(view_class, {"page": "3"}).context_data
+                self.assertEqual(
+                    [book.title for book in context["object_list"]],
+                    ["Ulysses"],
+                )
+                self.assertIs(context["page_obj"].has_next(), False)
+                self.assertEqual(context["paginator"].num_pages, 3)
+
+    def test_page_past_the_end(self):
+        for view_class in [views.CappedBookListView, views.AsyncCappedBookListView]:
+            with self.subTest(view_class=view_class.__name__):
+                with self.assertRaises(Http404):
+                    get_response(view_class, {"page": "4"})
+
+
+class LibraryTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ann = Author.objects.create(name="Ann")
+        cls.bob = Author.objects.create(name="Bob")
+        cls.cid = Author.objects.create(name="Cid")
+        cls.sf = Tag.objects.create(name="sf")
+        cls.classic = Tag.objects.create(name="classic")
+        cls.dune = Book.objects.create(
+            title="Dune",
+            author=cls.ann,
+            status="p",
+            pages=400,
+            published=date(1965, 8, 1),
+        )
+        cls.dune.tags.add(cls.sf, cls.classic)
+        cls.messiah = Book.objects.create(
+            title="Dune Messiah",
+            author=cls.ann,
+            status="p",
+            pages=250,
+            published=date(1969, 10, 15),
+        )
+        cls.messiah.tags.add(cls.sf)
+        cls.emma = Book.objects.create(
+            title="Emma",
+            author=cls.bob,
+            status="d",
+            pages=300,
+        )
+        cls.emma.tags.add(cls.classic)
+        cls.ulysses = Book.objects.create(
+            title="Ulysses",
+            author=cls.bob,
+            status="p",
+            pages=700,
+            published=date(1922, 2, 2),
+        )
+
+    def get_titles(self, response) -> list:
+        return [book.title for book in response.context_data["object_list"]]
+
+    def get_choices(self, response) -> dict:
+        """Return ``{title: [(display, count), ...]}`` of the response's filters."""
+        return {
+            title: [(choice["display"], choice.get("count")) for choice in choices]
+            for title, choices, _clear_url in response.context_data["filter_list"]
+        }
+
+
+class ChoicesFilterTests(LibraryTestCase):
+    @override_settings(FILTERVIEW_SHOW_UNUSED_FILTERS=False)
+    def test_used_choices_in_one_query(self):
+        # A single grouped query, not one per choice.
+        with self.assertNumQueries(1):
+            response = get_response(views.StatusBookListView)
+            choices = self.get_choices(response)
+        self.assertEqual(
+            choices,
+            {"status": [("All", None), ("Draft", None), ("Published", None)]},
+        )
+
+    def test_unused_choices_not_queried(self):
+        with self.assertNumQueries(0):
+            response = get_response(views.StatusBookListView)
+            choices = self.get_choices(response)
+        self.assertEqual(len(choices["status"]), 4)
+
+
+@override_settings(FILTERVIEW_SHOW_FACETS=True)
+class FacetCountTests(LibraryTestCase):
+    def test_counts_in_one_grouped_query(self):
+        with self.assertNumQueries(1):
+            response = get_response(views.StatusBookListView)
+            choices = self.get_choices(response)
+        self.assertEqual(
+            choices["status"],
+            [("All", None), ("Draft", 1), ("Published", 3), ("Retired", 0)],
+        )
+
+    def test_counts_apply_other_filters(self):
+        response = get_response(views.CombinedBookListView, {"status__exact": "p"})
+        self.assertEqual(
+            self.get_choices(response),
+            {
+                "author": [("All", None), ("Ann", 2), ("Bob", 1), ("Cid", 0)],
+                "status": [
+                    ("All", None),
+                    ("Draft", 1),
+                    ("Published", 3),
+                    ("Retired", 0),
+                ],
+                "tags": [("All", None), ("sf", 2), ("classic", 1), ("--", 1)],
+            },
+        )
+
+    def test_facets_combined(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get_choices(get_response(views.CombinedBookListView))
+        facet_sqls = [
+            query["sql"]
+            for query in queries.captured_queries
+            if "facet_count" in query["sql"]
+        ]
+        # Author and tag ids share a UNION ALL query; status values are text.
+        self.assertEqual(len(facet_sqls), 2)
+        self.assertEqual(sum("UNION ALL" in sql for sql in facet_sqls), 1)
+        # Plus one query for each related model's choices.
+        self.assertEqual(len(queries.captured_queries), 4)
+
+
+@override_settings(FILTERVIEW_MULTIPLE_CHOICE=True)
+class MultipleChoiceTests(LibraryTestCase):
+    def get_links(self, response, title: str) -> dict:
+        for filter_title, choices, _clear_url in response.context_data["filter_list"]:
+            if filter_title == title:
+                return {choice["display"]: choice["query_string"] for choice in choices}
+
+    def test_links_toggle_values(self):
+        response = get_response(
+            views.CombinedBookListView,
+            {"author__id__in": str(self.ann.pk)},
+        )
+        links = self.get_links(response, "author")
+        self.assertEqual(links["Ann"], "/")
+        both = "%2C".join(sorted([str(self.ann.pk), str(self.bob.pk)]))
+        self.assertEqual(links["Bob"], f"/?author__id__in={both}")
+
+    def test_links_keep_other_filters(self):
+        response = get_response(views.CombinedBookListView, {"status__in": "d"})
+        links = self.get_links(response, "status")
+        self.assertEqual(links["Draft"], "/")
+        self.assertEqual(links["Published"], "/?status__in=d%2Cp")
+        links = self.get_links(response, "author")
+        self.assertEqual(links["Ann"], f"/?author__id__in={self.ann.pk}&status__in=d")
+
+    def test_values_matched_with_in(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = get_response(
+                views.CombinedBookListView,
+                {"author__id__in": f"{self.cid.pk},{self.bob.pk}"},
+            )
+            titles = self.get_titles(response)
+        self.assertEqual(titles, ["Emma", "Ulysses"])
+        self.assertIn(" IN (", queries.captured_queries[-1]["sql"])
+
+    def test_choice_values_matched_with_in(self):
+        response = get_response(views.CombinedBookListView, {"status__in": "r,d"})
+        self.assertEqual(self.get_titles(response), ["Emma"])
+
+
+@override_settings(FILTERVIEW_NARROW_CHOICES=True)
+class NarrowChoicesTests(LibraryTestCase):
+    def test_choices_narrowed_by_other_filters(self):
+        response = get_response(views.CombinedBookListView, {"status__exact": "d"})
+        self.assertEqual(
+            self.get_choices(response),
+            {
+                "author": [("All", None), ("Bob", None)],
+                # Not narrowed by its own value.
+                "status": [("All", None), ("Draft", None), ("Published", None)],
+                "tags": [("All", None), ("classic", None), ("--", None)],
+            },
+        )
+
+    def test_narrowed_in_subqueries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get_choices(
+                get_response(
+                    views.CombinedBookListView,
+                    {"author__id__exact": self.ann.pk},
+                ),
+            )
+        # Choices of each filter, without loading the object list.
+        self.assertEqual(len(queries.captured_queries), 3)
+        tags_sql = queries.captured_queries[1]["sql"]
+        self.assertIn("tests_tag", tags_sql)
+        self.assertIn("IN (SELECT", tags_sql)
+
+
+class RangeFilterTests(LibraryTestCase):
+    def test_numeric_range(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = get_response(
+                views.RangeBookListView,
+                {"pages__gte": "300", "pages__lt": "500"},
+            )
+            titles = self.get_titles(response)
+        self.assertEqual(titles, ["Dune", "Emma"])
+        sql = queries.captured_queries[-1]["sql"]
+        self.assertIn('"tests_book"."pages" >= 300', sql)
+        self.assertIn('"tests_book"."pages" < 500', sql)
+
+    def test_date_range(self):
+        response = get_response(
+            views.RangeBookListView,
+            {"published__gte": "1960-01-01"},
+        )
+        self.assertEqual(self.get_titles(response), ["Dune", "Dune Messiah"])
+        response = get_response(views.RangeBookListView, {"published__isnull": "True"})
+        self.assertEqual(self.get_titles(response), ["Emma"])
+
+    def test_blank_and_invalid_bounds_ignored(self):
+        for since in ["", " ", "many"]:
+            with self.subTest(since=since):
+                response = get_response(
+                    views.RangeBookListView,
+                    {"pages__gte": since, "pages__lt": "350"},
+                )
+                self.assertEqual(
+                    self.get_titles(response),
+                    ["Dune Messiah", "Emma"],
+                )
+                _title, choices, _url = response.context_data["filter_list"][0]
+                self.assertEqual(
+                    choices[-1]["range"],
+                    {
+                        "since_param": "pages__gte",
+                        "until_param": "pages__lt",
+                        "since": None,
+                        "until": "350",
+                    },
+                )
+
+    @override_settings(FILTERVIEW_SHOW_FACETS=True)
+    def test_bucket_counts_in_one_query(self):
+        # One aggregate query per range filter.
+        with self.assertNumQueries(2):
+            response = get_response(
+                views.RangeBookListView,
+                {"published__gte": "1960-01-01"},
+            )
+            choices = self.get_choices(response)["pages"]
+        self.assertEqual(
+            choices,
+            [
+                ("All", None),
+                ("< 300", 1),
+                ("300 – 500", 1),
+                ("≥ 500", 0),
+                ("No value", 0),
+                ("Has value", 2),
+                ("Custom range", None),
+            ],
+        )
+
+
+class AsyncFilterViewTests(LibraryTestCase):
+    def get_async_choices(self, query: dict) -> dict:
+        """Return the choices, built within the event loop as a template would."""
+        request = RequestFactory().get("/", query)
+        request.user = AnonymousUser()
+        view = views.AsyncCombinedBookListView.as_view()
+
+        async def get_choices():
+            # Any sync query left raises SynchronousOnlyOperation here.
+            response = await view(request)
+            return self.get_choices(response)
+
+        return async_to_sync(get_choices)()
+
+    def assertSameChoices(self, query: dict):
+        response = get_response(views.CombinedBookListView, query)
+        self.assertEqual(self.get_async_choices(query), self.get_choices(response))
+
+    def test_choices(self):
+        self.assertSameChoices({"status__exact": "p"})
+
+    @override_settings(FILTERVIEW_SHOW_FACETS=True)
+    def test_facets(self):
+        self.assertSameChoices({"author__id__exact": self.bob.pk})
+
+    @override_settings(
+        FILTERVIEW_NARROW_CHOICES=True,
+        FILTERVIEW_SHOW_UNUSED_FILTERS=False,
+    )
+    def test_narrowed_choices(self):
+        self.assertSameChoices({"status__exact": "d"})
+
+    def test_page_counted_ahead(self):
+        response = get_response(views.AsyncCombinedBookListView, {"page": "2"})
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_titles(response), ["Emma", "Ulysses"])
+        self.assertEqual(response.context_data["paginator"].count, 4)
+
+
+class ConditionalGetTests(LibraryTestCase):
+    view_classes = [views.ConditionalBookListView, views.AsyncConditionalBookListView]
+
+    def test_not_modified(self):
+        for view_class in self.view_classes:
+            with self.subTest(view_class=view_class.__name__):
+                query = {"author__id__exact": self.ann.pk}
+                response = get_response(view_class, query)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.headers["Last-Modified"])
+                # Only the validators are read.
+                with self.assertNumQueries(1):
+                    response = get_response(
+                        view_class,
+                        query,
+                        headers={"If-None-Match": response.headers["ETag"]},
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_modified(self):
+        for view_class in self.view_classes:
+            with self.subTest(view_class=view_class.__name__):
+                query = {"author__id__exact": self.ann.pk}
+                etag = get_response(view_class, query).headers["ETag"]
+                self.dune.save()
+                headers = {"If-None-Match": etag}
+                response = get_response(view_class, query, headers=headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_etag_depends_on_filters(self):
+        etags = {
+            get_response(views.ConditionalBookListView, query).headers["ETag"]
+            for query in [
+                {},
+                {"author__id__exact": self.ann.pk},
+                {"author__id__exact": self.bob.pk},
+            ]
+        }
+        self.assertEqual(len(etags), 3)
+
+
+class CanonicalRedirectTests(LibraryTestCase):
+    view_classes = [views.CanonicalBookListView, views.AsyncCanonicalBookListView]
+
+    def assertRedirectsTo(self, query: dict, query_string: str):
+        for view_class in self.view_classes:
+            with self.subTest(view_class=view_class.__name__):
+                response = get_response(view_class, query)
+                self.assertEqual(response.status_code, 302)
+                self.assertEqual(response.url, f"/?{query_string}")
+
+    def test_sorted_without_first_page(self):
+        self.assertRedirectsTo(
+            {"status__exact": "p", "author__id__exact": self.ann.pk, "page": "1"},
+            f"author__id__exact={self.ann.pk}&status__exact=p",
+        )
+
+    def test_values_normalized(self):
+        ids = sorted([str(self.ann.pk), str(self.bob.pk)])
+        self.assertRedirectsTo(
+            {"author__id__in": f"{ids[1]},{ids[0]},{ids[1]}"},
+            f"author__id__in={ids[0]}%2C{ids[1]}",
+        )
+        self.assertRedirectsTo(
+            {"author__id__exact": f"0{self.ann.pk}"},
+            f"author__id__exact={self.ann.pk}",
+        )
+
+    def test_canonical_not_redirected(self):
+        query = {"author__id__exact": self.ann.pk, "status__exact": "p"}
+        for view_class in self.view_classes:
+            with self.subTest(view_class=view_class.__name__):
+                response = get_response(view_class, query)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.get_titles(response), ["Dune", "Dune Messiah"])
+
+
+class MultiValuedFilterTests(LibraryTestCase):
+    def test_no_duplicate_rows(self):
+        query = {"tags__id__in": f"{self.sf.pk},{self.classic.pk}"}
+        with CaptureQueriesContext(connection) as queries:
+            response = get_response(views.CombinedBookListView, query, paginate_by=2)
+            titles = self.get_titles(response)
+        self.assertEqual(titles, ["Dune", "Dune Messiah"])
+        self.assertEqual(response.context_data["paginator"].count, 3)
+        for query in queries.captured_queries:
+            self.assertNotIn("DISTINCT", query["sql"])
+
+    def test_combined_with_other_filters(self):
+        response = get_response(
+            views.CombinedBookListView,
+            {"tags__id__in": f"{self.sf.pk},{self.classic.pk}", "status__exact": "p"},
+        )
+        self.assertEqual(self.get_titles(response), ["Dune", "Dune Messiah"])
+
+
+class CursorPaginationTests(LibraryTestCase):
+    view_classes = [views.CursorBookListView, views.AsyncCursorBookListView]
+
+    def follow(self, view_class, url: str):
+        """Return the response of <view_class> to the link <url>."""
+        return get_response(view_class, QueryDict(urlsplit(url).query))
+
+    def test_next_and_previous(self):
+        first_page = ["Dune", "Dune Messiah"]
+        for view_class in self.view_classes:
+            with self.subTest(view_class=view_class.__name__):
+                with CaptureQueriesContext(connection) as queries:
+                    response = get_response(view_class)
+                    self.assertEqual(self.get_titles(response), first_page)
+                self.assertIsNone(response.context_data["previous_page_url"])
+                for query in queries.captured_queries:
+                    self.assertNotIn("COUNT(", query["sql"])
+
+                url = response.context_data["next_page_url"]
+                response = self.follow(view_class, url)
+                self.assertEqual(self.get_titles(response), ["Emma", "Ulysses"])
+                self.assertIsNone(response.context_data["next_page_url"])
+
+                url = response.context_data["previous_page_url"]
+                response = self.follow(view_class, url)
+                self.assertEqual(self.get_titles(response), first_page)
+                self.assertIsNone(response.context_data["previous_page_url"])
+
+    def test_filters_kept(self):
+        query = {"status__exact": "p"}
+        response = get_response(views.CursorBookListView, query)
+        url = response.context_data["next_page_url"]
+        self.assertIn("status__exact=p", url)
+        response = self.follow(views.CursorBookListView, url)
+        self.assertEqual(self.get_titles(response), ["Ulysses"])
+
+    def test_tampered_cursor(self):
+        url = get_response(views.CursorBookListView).context_data["next_page_url"]
+        cursor = QueryDict(urlsplit(url).query)["cursor"]
+        for view_class in self.view_classes:
+            for value in [cursor[:-1] + "x", "abc"]:
+                with self.subTest(view_class=view_class.__name__, cursor=value):
+                    with self.assertRaises(Http404):
+                        get_response(view_class, {"cursor": value})
+
+
+class DisplayPlanTests(LibraryTestCase):
+    def test_plan(self):
+        view = views.BookListView()
+        self.assertEqual(
+            view.resolve_display_plan(Book, ["title", "author__name", "tags__name"]),
+            {
+                "select_related": ["author"],
+                "prefetch_related": ["tags"],
+                "only": ["title", "author__name"],
+            },
+        )
+        self.assertEqual(
+            view.resolve_display_plan(Book, ["author", "status"]),
+            {
+                "select_related": ["author"],
+                "prefetch_related": [],
+                "only": ["author", "status"],
+            },
+        )
+
+    def test_callable_loads_every_field(self):
+        plan = views.DisplayBookListView().get_display_plan(Book)
+        self.assertEqual(plan["select_related"], ["author"])
+        self.assertEqual(plan["prefetch_related"], ["tags"])
+        self.assertIsNone(plan["only"])
+
+    def test_object_list_loaded(self):
+        response = get_response(
+            views.BookListView,
+            list_display=["title", "author__name", "tags__name"],
+        )
+        # The books with their authors, then their tags.
+        with self.assertNumQueries(2):
+            rows = [
+                (book.title, book.author.name, sorted(t.name for t in book.tags.all()))
+                for book in response.context_data["object_list"]
+            ]
+            deferred = response.context_data["object_list"][0].get_deferred_fields()
+        self.assertEqual(rows[0], ("Dune", "Ann", ["classic", "sf"]))
+        self.assertIn("pages", deferred)
+
+
+class SimpleFilterTests(LibraryTestCase):
+    def test_lookup_filters(self):
+        for value, titles in [
+            ("sf", ["Dune", "Dune Messiah"]),
+            ("tagged", ["Dune", "Dune Messiah", "Emma"]),
+            ("long", ["Dune", "Ulysses"]),
+            ("unknown", []),
+        ]:
+            with self.subTest(value=value):
+                response = get_response(views.ShelfBookListView, {"shelf": value})
+                self.assertEqual(self.get_titles(response), titles)
+
+    @override_settings(FILTERVIEW_SHOW_FACETS=True)
+    def test_counts_across_to_many_join(self):
+        # Dune has two tags, but is counted once by every lookup.
+        with self.assertNumQueries(1):
+            response = get_response(
+                views.ShelfBookListView,
+                list_filter=[views.ShelfFilter],
+            )
+            choices = self.get_choices(response)["Shelf"]
+        self.assertEqual(
+            choices,
+            [
+                ("All", None),
+                ("Science fiction", 2),
+                ("Tagged", 3),
+                ("Long", 2),
+                ("Retired", 0),
+            ],
+        )
+
+    @override_settings(FILTERVIEW_SHOW_FACETS=True)
+    def test_counts_apply_other_filters(self):
+        response = get_response(views.ShelfBookListView, {"status__exact": "p"})
+        self.assertEqual(
+            [count for _display, count in self.get_choices(response)["Shelf"]],
+            [None, 2, 2, 2, 0],
+        )
+
+    @override_settings(FILTERVIEW_SHOW_UNUSED_FILTERS=False)
+    def test_unused_lookups_hidden(self):
+        with self.assertNumQueries(1):
+            response = get_response(
+                views.ShelfBookListView,
+                list_filter=[views.ShelfFilter],
+            )
+            choices = self.get_choices(response)["Shelf"]
+        self.assertEqual(
+            [display for display, _count in choices],
+            ["All", "Science fiction", "Tagged", "Long"],
+        )
@@ -0,0 +1,25 @@
+from django_listview_filters.views import autocomplete_path, export_path, facets_path
+
+from .views import (
+    AutocompleteBookListView,
+    BookListView,
+    ConditionalBookListView,
+    DisplayBookListView,
+    FacetedBookListView,
+    PrivateBookListView,
+)
+
+urlpatterns = [
+    autocomplete_path("books/filters/", AutocompleteBookListView),
+    export_path("books/export.csv", BookListView),
+    export_path("private/export.csv", PrivateBookListView),
+    export_path("display/export.csv", DisplayBookListView),
+    export_path("faceted/export.csv", FacetedBookListView),
+    facets_path("faceted/facets/", FacetedBookListView),
+    facets_path("conditional/facets/", ConditionalBookListView),
+    export_path(
+        "tags/export.csv",
+        BookListView,
+        export_fields=["title", "tags__name"],
+    ),
+]
@@ -0,0 +1,146 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Q
+from django.views.generic import ListView
+
+from django_listview_filters.filters import (
+    AllValuesFieldListFilter,
+    NumericRangeListViewFilter,
+    RelatedFieldAutocompleteListViewFilter,
+    RelatedFieldListViewFilter,
+    SimpleListViewFilter,
+)
+from django_listview_filters.mixins import AsyncFilterViewMixin, FilterViewMixin
+from django_listview_filters.search import SQLiteFTS5SearchBackend
+
+from .models import Book
+
+
+class BookListView(FilterViewMixin, ListView):
+    queryset = Book.objects.all()
+    list_filter = ["author"]
+    ordering = ["title"]
+
+
+class PrivateBookListView(LoginRequiredMixin, BookListView):
+    pass
+
+
+def title_length(book):
+    return len(book.title)
+
+
+class DisplayBookListView(BookListView):
+    list_display = ["title", title_length, "__str__", "author__name", "tags__name"]
+
+
+class PagedBookListView(BookListView):
+    paginate_by = 1
+
+
+class ExactCountBookListView(PagedBookListView):
+    count_strategy = "exact"
+
+
+class AuthorFilterWithAll(RelatedFieldListViewFilter):
+    show_all = True
+
+
+class AllAuthorsBookListView(BookListView):
+    list_filter = [("author", AuthorFilterWithAll)]
+
+
+class TitleBookListView(BookListView):
+    list_filter = [("title", AllValuesFieldListFilter)]
+
+
+class AutocompleteBookListView(FilterViewMixin, ListView):
+    list_filter = [("author", RelatedFieldAutocompleteListViewFilter)]
+
+    def get_queryset(self):
+        return self.filter_queryset(Book.objects.order_by("title"))
+
+
+class FacetedBookListView(BookListView):
+    list_filter = ["author", "tags"]
+
+
+class ConditionalBookListView(FacetedBookListView):
+    conditional_get = True
+    updated_field = "updated"
+
+
+class AsyncConditionalBookListView(AsyncFilterViewMixin, ConditionalBookListView):
+    pass
+
+
+class CappedBookListView(BookListView):
+    paginate_by = 1
+    count_strategy = "capped"
+    count_threshold = 1
+
+
+class AsyncCappedBookListView(AsyncFilterViewMixin, CappedBookListView):
+    pass
+
+
+class BookFTS5SearchBackend(SQLiteFTS5SearchBackend):
+    fts_table = "tests_book_fts"
+
+
+class SearchBookListView(BookListView):
+    search_fields = ["title"]
+    search_backend = BookFTS5SearchBackend
+
+
+class StatusBookListView(BookListView):
+    list_filter = ["status"]
+
+
+class CombinedBookListView(BookListView):
+    list_filter = ["author", "status", "tags"]
+
+
+class PagesFilter(NumericRangeListViewFilter):
+    buckets = [300, 500]
+
+
+class RangeBookListView(BookListView):
+    list_filter = [("pages", PagesFilter), "published"]
+
+
+class AsyncCombinedBookListView(AsyncFilterViewMixin, CombinedBookListView):
+    paginate_by = 2
+
+
+class CanonicalBookListView(CombinedBookListView):
+    canonical_redirect = True
+
+
+class AsyncCanonicalBookListView(AsyncFilterViewMixin, CanonicalBookListView):
+    pass
+
+
+class CursorBookListView(CombinedBookListView):
+    paginate_by = 2
+    cursor_pagination = True
+
+
+class AsyncCursorBookListView(AsyncFilterViewMixin, CursorBookListView):
+    pass
+
+
+class ShelfFilter(SimpleListViewFilter):
+    title = "Shelf"
+    parameter_name = "shelf"
+
+    def lookups(self, request, model):
+        return [
+            ("sf", "Science fiction", Q(tags__name="sf")),
+            ("tagged", "Tagged", Q(tags__name__in=["sf", "classic"])),
+            ("long", "Long", Q(pages__gte=350)),
+            ("retired", "Retired", Q(status="r")),
+        ]
+
+
+class ShelfBookListView(BookListView):
+    list_filter = [ShelfFilter, "status"]